@@ -0,0 +1,352 @@
+#!/usr/bin/python3
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import types
+
+# Render offscreen, the benchmarks never need a real window.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np  # noqa: E402
+import pygame  # noqa: E402
+
+from utils import board as board_model  # noqa: E402
+from utils import engine  # noqa: E402
+from utils import game  # noqa: E402
+from utils import replay  # noqa: E402
+from utils import solver  # noqa: E402
+
+
+# Board sizes (rows, columns) measured by default.
+DEFAULT_SIZES = ((9, 9), (16, 16), (16, 30), (30, 70), (200, 200),
+                 (1000, 1000))
+
+# Share of the cells holding a bomb, as in the expert level.
+BOMB_DENSITY = 0.2
+
+
+def measure(function, repeat):
+    """Times a function a number of times.
+
+    Args:
+        function: Callable taking no arguments. It may return a setup
+            callable, in which case only that callable is timed, so
+            each run can prepare its own input.
+        repeat: How many times to run it.
+
+    Returns:
+        A list with the duration of every run, in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        timed = function()
+        if callable(timed):
+            start = time.perf_counter()
+            timed()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def make_game(rows, columns, bombs):
+    """Builds a Game on the offscreen display.
+
+    Args:
+        rows: Number of rows of the board.
+        columns: Number of columns of the board.
+        bombs: Number of bombs of the board.
+
+    Returns:
+        A Game object with its assets loaded and an engine set up.
+    """
+    settings = types.SimpleNamespace(rows=rows, columns=columns,
+                                     bombs=bombs, seconds=999, seed=None)
+    game_board = game.Game(settings)
+    game_board.load_assets()
+    game_board.engine = game_board.create_game_structure()
+    return game_board
+
+
+def bench_size(rows, columns, repeat):
+    """Runs every benchmark for one board size.
+
+    Args:
+        rows: Number of rows of the board.
+        columns: Number of columns of the board.
+        repeat: How many times every benchmark runs.
+
+    Returns:
+        A list of result dictionaries.
+    """
+    bombs = int(rows * columns * BOMB_DENSITY)
+    rnd = random.Random(0)
+    results = []
+
+    def record(name, timings, per=1):
+        results.append({
+            "name": name,
+            "size": f"{rows}x{columns}",
+            "rows": rows,
+            "columns": columns,
+            "bombs": bombs,
+            "repeat": len(timings),
+            "best": min(timings) / per,
+            "median": statistics.median(timings) / per,
+        })
+
+    game_board = make_game(rows, columns, bombs)
+
+    # Board generation, zero region index included.
+    record("create_game_structure",
+           measure(game_board.create_game_structure, repeat))
+
+    # Opening cascade, with and without the zero region index, on the
+    # same boards from the same cells.
+    for name, indexed in (("cascade", False), ("cascade_indexed", True)):
+        boards = random.Random(1)
+
+        def cascade():
+            board = board_model.Board(columns, rows, bombs,
+                                      seed=boards.randrange(2 ** 32),
+                                      index_regions=indexed)
+            # Start from a cell of the biggest zero region.
+            labels = board_model.label_zero_regions(board.values == 0)
+            if labels.max(initial=-1) < 0:
+                return None
+            biggest = np.argmax(np.bincount(labels[labels >= 0]))
+            start = int(np.argmax(labels == biggest))
+            return lambda: board.cascade(*divmod(start, rows))
+        record(name, measure(cascade, repeat))
+
+    # Solving a board as far as certain moves go, from its first
+    # zero cell, timed per move.
+    moves = []
+
+    def solve():
+        game_engine = engine.new_game(rows, columns, bombs,
+                                      seed=rnd.randrange(2 ** 32))
+        zeros = np.argwhere(game_engine.board.values == 0)
+        start = tuple(zeros[0]) if len(zeros) else (0, 0)
+        return lambda: moves.append(solver.play(game_engine, start))
+    timings = measure(solve, repeat)
+    record("solver_play", [timing / max(1, played)
+                           for timing, played in zip(timings, moves)])
+
+    # Hit-testing and dispatching of clicks on random visible blocks.
+    clicks = 1000
+    view = game_board.view_area()
+
+    def update_struct():
+        game_board.engine = game_board.create_game_structure()
+        positions = [(view.x + rnd.randrange(view.w),
+                      view.y + rnd.randrange(view.h),
+                      rnd.choice((1, 2)))
+                     for _ in range(clicks)]
+
+        def run():
+            for x, y, action in positions:
+                game_board.update_struct((x, y), action)
+        return run
+    record("update_struct", measure(update_struct, repeat), clicks)
+
+    # Adjacency counts of the whole board, the pass every generation
+    # runs after placing the bombs.
+    mines = np.zeros((columns, rows), dtype=bool)
+    mines.reshape(-1)[rnd.sample(range(rows * columns), bombs)] = True
+    record("count_adjacent",
+           measure(lambda: board_model.count_adjacent(mines), repeat))
+
+    # One full render pass of the game window, blitting every visible
+    # block and through the vectorized table drawing.
+    for name, vectorized in (("render", False), ("render_vectorized", True)):
+        def render():
+            game_board.engine = game_board.create_game_structure()
+            board = game_board.engine.board
+
+            def run():
+                game_board._BOARD.fill(game_board._WHITE)
+                if vectorized:
+                    game_board.draw_board(board, 0)
+                else:
+                    game_board.draw_blocks(board, 0)
+                game_board.draw_hud(game_board.engine.flags_left(),
+                                    game_board.engine.time_left, 0)
+                pygame.display.flip()
+            return run
+        record(name, measure(render, repeat))
+
+    # Startup of a lazily generated board: its creation together with
+    # the first draw of the table, which generates the visible chunks.
+    def render_chunked():
+        board = engine.new_game(rows, columns, bombs,
+                                seed=rnd.randrange(2 ** 32),
+                                chunked=True).board
+        game_board.draw_board(board, 0)
+    record("render_chunked", measure(render_chunked, repeat))
+
+    # Zooming in and out over every level, drawing the table each time.
+    # Tiles come from the zoom cache after the first pass.
+    levels = len(game_board._ZOOM_LEVELS)
+
+    def zoom():
+        board = game_board.engine.board
+        for steps in [1] * levels + [-1] * levels:
+            game_board.zoom_by(steps)
+            game_board.draw_board(board, 0)
+    record("zoom", measure(zoom, repeat), 2 * levels)
+
+    return results
+
+
+def parse_size(text):
+    """Parses a ROWSxCOLUMNS board size.
+
+    Args:
+        text: Board size such as "16x30".
+
+    Returns:
+        A (rows, columns) tuple.
+    """
+    rows, columns = text.lower().split("x")
+    return int(rows), int(columns)
+
+
+def run(args):
+    """Runs the benchmarks and writes them to a JSON file.
+
+    Args:
+        args: Parsed command line arguments.
+
+    Returns:
+        The process exit code.
+    """
+    sizes = ([parse_size(size) for size in args.sizes]
+             if args.sizes else DEFAULT_SIZES)
+    results = []
+    for rows, columns in sizes:
+        for result in bench_size(rows, columns, args.repeat):
+            print(f"{result['name']:<22} {result['size']:>10} "
+                  f"{result['median'] * 1000:12.4f} ms")
+            results.append(result)
+    pygame.quit()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+def compare(args):
+    """Compares two benchmark files and flags regressions.
+
+    A benchmark regresses when its median got slower than the
+    baseline by more than the threshold.
+
+    Args:
+        args: Parsed command line arguments.
+
+    Returns:
+        1 if there is any regression, 0 otherwise.
+    """
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    with open(args.current) as current_file:
+        current = json.load(current_file)["results"]
+
+    reference = {(result["name"], result["size"]): result["median"]
+                 for result in baseline}
+    regressions = 0
+    for result in current:
+        key = (result["name"], result["size"])
+        if key not in reference:
+            continue
+        ratio = result["median"] / reference[key]
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "REGRESSION"
+            regressions += 1
+        print(f"{key[0]:<22} {key[1]:>10} {reference[key] * 1000:12.4f} ms "
+              f"-> {result['median'] * 1000:12.4f} ms  x{ratio:6.2f} {flag}")
+    print(f"{regressions} regression(s)")
+    return 1 if regressions else 0
+
+
+def replay_logs(args):
+    """Replays game logs headless, as fast as possible.
+
+    Reports the outcome and the speed of every replay and a summary,
+    so recorded sessions can serve as regression and performance
+    checks.
+
+    Args:
+        args: Parsed command line arguments.
+
+    Returns:
+        The process exit code.
+    """
+    outcomes = ("playing", "won", "lost")
+    total_actions = 0
+    total_time = 0.0
+    for path in args.logs:
+        start = time.perf_counter()
+        engine_state, actions = replay.replay(path)
+        spent = time.perf_counter() - start
+        total_actions += actions
+        total_time += spent
+        print(f"{path:<40} {outcomes[engine_state.state()]:>8} "
+              f"{actions:8d} actions {spent * 1000:12.4f} ms")
+    rate = total_actions / total_time if total_time else 0.0
+    print(f"{len(args.logs)} log(s), {total_actions} actions in "
+          f"{total_time:.3f} s, {rate:.0f} actions/s")
+    return 0
+
+
+def main():
+    """Parses the command line and dispatches to a subcommand."""
+    parser = argparse.ArgumentParser(
+            description="Benchmarks of the minesweeper hot paths.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--sizes", nargs="+", metavar="ROWSxCOLS",
+                            help="board sizes to measure")
+    run_parser.add_argument("--repeat", type=int, default=5,
+                            help="runs of every benchmark")
+    run_parser.add_argument("--output", default="benchmark.json",
+                            help="JSON file the results are written to")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser(
+            "compare", help="compare results against a saved baseline")
+    compare_parser.add_argument("baseline", help="baseline JSON file")
+    compare_parser.add_argument("current", help="current JSON file")
+    compare_parser.add_argument("--threshold", type=float, default=0.25,
+                                help="allowed slowdown, 0.25 being 25%%")
+    compare_parser.set_defaults(handler=compare)
+
+    replay_parser = commands.add_parser(
+            "replay", help="replay recorded games headless")
+    replay_parser.add_argument("logs", nargs="+", help="replay log files")
+    replay_parser.set_defaults(handler=replay_logs)
+
+    args = parser.parse_args()
+    sys.exit(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
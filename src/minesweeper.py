@@ -1,58 +1,202 @@
 #!/usr/bin/python3
-from utils import info_board
-from utils import game
+import argparse
+import json
+import sys
+import types
 
+from utils import engine
+from utils import generator
+from utils import replay
+from utils import settings
+from utils import solver
 
-def info_display():
-    """Provies the user with the initial display.
 
-    Initially, a board is created to retrieve the user's
-    options regarding the game's parameters(rows, columns, bombs and
-    game seconds). Default values for these fields are provided.
+# Names of the game states in the headless report.
+STATES = ("playing", "won", "lost")
 
-    Returns:
-        A board object with the filled in data.
-    """
-    # Create the info board object.
-    board = info_board.InfoBoard()
+# First click modes by their command line name.
+FIRST_CLICKS = {
+    "any": engine.FIRST_ANY,
+    "safe": engine.FIRST_SAFE,
+    "opening": engine.FIRST_OPENING,
+}
 
-    # Open up the game/display loop.
-    board.display_loop()
 
-    return board
+def parse_args(argv=None):
+    """Parses the command line.
 
+    Board options are checked against the same rules as the fields
+    of the settings screen.
 
-def game_display(board):
-    """Main game display with the actual minesweeper game.
+    Args:
+        argv: Optional list of arguments, defaults to sys.argv.
 
-    Using the information provided by the initial info board,
-    the game board is then built up and the game is ready to be
-    played.
+    Returns:
+        The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+            description="Minesweeper game. Any board option skips the "
+                        "settings screen.")
+    parser.add_argument("--rows", type=int,
+                        help=f"number of rows, {settings.MIN_ROWS} to "
+                             f"{settings.MAX_ROWS}")
+    parser.add_argument("--cols", type=int,
+                        help=f"number of columns, {settings.MIN_COLUMNS} to "
+                             f"{settings.MAX_COLUMNS}")
+    parser.add_argument("--bombs", type=int,
+                        help="number of bombs, 0 to rows x columns")
+    parser.add_argument("--seconds", type=int,
+                        help=f"time limit, at least {settings.MIN_SECONDS}")
+    parser.add_argument("--seed", type=int,
+                        help="seed of the first board")
+    parser.add_argument("--headless", action="store_true",
+                        help="play without a window, reading 'reveal X Y', "
+                             "'flag X Y', 'tick [SECONDS]' and "
+                             "'solve [X Y]' commands from the standard "
+                             "input")
+    parser.add_argument("--no-guess", action="store_true",
+                        help="only play boards solved by pure logic from "
+                             "their opening, which is discovered first")
+    parser.add_argument("--first-click", choices=FIRST_CLICKS,
+                        default="any",
+                        help="whether the first cell discovered may be a "
+                             "bomb, is never one, or always opens up")
+    parser.add_argument("--replay-dir",
+                        help="directory every game is recorded to")
+    args = parser.parse_args(argv)
+
+    if args.rows is not None and not settings.validate_rows(args.rows):
+        parser.error(f"--rows must be between {settings.MIN_ROWS} "
+                     f"and {settings.MAX_ROWS}")
+    if args.cols is not None and not settings.validate_cols(args.cols):
+        parser.error(f"--cols must be between {settings.MIN_COLUMNS} "
+                     f"and {settings.MAX_COLUMNS}")
+    rows = settings.DEFAULT_ROWS if args.rows is None else args.rows
+    cols = settings.DEFAULT_COLUMNS if args.cols is None else args.cols
+    if args.bombs is not None and \
+            not settings.validate_bombs(args.bombs, rows, cols):
+        parser.error("--bombs must be between 0 and rows x columns")
+    if args.seconds is not None and \
+            not settings.validate_seconds(args.seconds):
+        parser.error(f"--seconds must be at least {settings.MIN_SECONDS}")
+    if args.seed is not None and not settings.validate_seed(args.seed):
+        parser.error(f"--seed must be between 0 and {settings.MAX_SEED}")
+    return args
+
+
+def board_settings(args):
+    """Gathers the board settings given on the command line.
 
     Args:
-        board: A reference to the aforementioned info board.
-            Contains input data necessary to build up the game board.
+        args: Parsed command line arguments.
+
+    Returns:
+        An object with the rows, columns, bombs, seconds and seed of
+        the board, as the settings screen provides them, or None if
+        no board option was given.
     """
-    # Initiate pygame config info.
-    game_board = game.Game(board)
+    options = (args.rows, args.cols, args.bombs, args.seconds, args.seed)
+    if all(option is None for option in options) and not args.headless:
+        return None
+
+    def pick(value, default):
+        return default if value is None else value
 
-    # Start the main game loop.
-    game_board.game_loop()
+    return types.SimpleNamespace(
+            rows=pick(args.rows, settings.DEFAULT_ROWS),
+            columns=pick(args.cols, settings.DEFAULT_COLUMNS),
+            bombs=pick(args.bombs, settings.DEFAULT_BOMBS),
+            seconds=pick(args.seconds, settings.DEFAULT_SECONDS),
+            seed=args.seed)
 
 
-def main():
+def play_headless(board, commands, replay_dir=None, no_guess=False,
+                  first_click=engine.FIRST_ANY):
+    """Plays a game without any window.
+
+    Args:
+        board: Board settings, see board_settings.
+        commands: Iterable of command lines, 'reveal X Y', 'flag X Y',
+            'tick [SECONDS]' or 'solve [X Y]', which plays the certain
+            moves after discovering the optional cell. Blank lines and
+            lines starting with # are skipped.
+        replay_dir: Optional directory the game is recorded to.
+        no_guess: Whether the board is one solved by pure logic from
+            its opening, which is discovered before the commands run.
+            A given seed is played as is.
+        first_click: engine.FIRST_ANY, FIRST_SAFE or FIRST_OPENING.
+
+    Returns:
+        A dictionary describing the game once the commands ran out.
+    """
+    cells = board.rows * board.columns
+    seed, start = board.seed, None
+    if no_guess and seed is None:
+        boards = generator.NoGuessGenerator(board.rows, board.columns,
+                                            board.bombs, size=1)
+        seed, start = boards.get()
+        boards.close()
+    game = engine.new_game(board.rows, board.columns, board.bombs,
+                           seed=seed, seconds=board.seconds,
+                           index_regions=cells <= engine.INDEX_CELLS,
+                           chunked=cells >= engine.CHUNKED_CELLS,
+                           first_click=first_click)
+    if replay_dir is not None:
+        replay.record(game, replay.log_path(replay_dir, game.board.seed))
+    if no_guess:
+        generator.open_start(game, start)
+    actions = {
+        "reveal": game.reveal,
+        "flag": game.toggle_flag,
+        "tick": game.tick,
+        "solve": lambda *start: solver.play(game, start or None),
+    }
+    for line in commands:
+        words = line.split()
+        if not words or words[0].startswith("#"):
+            continue
+        if words[0] not in actions:
+            raise ValueError(f"unknown command: {line.strip()}")
+        actions[words[0]](*(int(word) for word in words[1:]))
+    if game.log is not None:
+        game.log.close()
+    return {
+        "seed": game.board.seed,
+        "state": STATES[game.state()],
+        "revealed": game.board.revealed,
+        "flags_left": game.flags_left(),
+        "time_left": game.time_left,
+    }
+
+
+def main(argv=None):
     """Start the game's development.
 
-    Opens up flow control to the two main subsections of the game.
+    Opens up flow control to the two main subsections of the game,
+    run as scenes of one application window.
     The first one, a starting window that deals with receiving
     information from the user, such as the number of columns, rows,
-    bombs or the number of seconds.
+    bombs or the number of seconds. It is skipped when the board is
+    given on the command line.
     The second one, the minesweeper game ready to be played.
-    The third one, a display that shows the games' result.
-    """
-    board = info_display()
+    Headless games never import pygame.
 
-    game_display(board)
+    Args:
+        argv: Optional list of arguments, defaults to sys.argv.
+    """
+    args = parse_args(argv)
+    board = board_settings(args)
+
+    if args.headless:
+        print(json.dumps(play_headless(
+                board, sys.stdin, args.replay_dir, args.no_guess,
+                FIRST_CLICKS[args.first_click])))
+        return
+
+    # Only windowed games need pygame.
+    from utils import app
+    app.App(replay_dir=args.replay_dir, no_guess=args.no_guess,
+            first_click=FIRST_CLICKS[args.first_click]).run(board)
 
 
 if __name__ == "__main__":
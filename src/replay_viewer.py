@@ -0,0 +1,25 @@
+#!/usr/bin/python3
+import argparse
+
+import pygame
+
+from utils import viewer
+
+
+def main():
+    """Opens a replay log in the replay viewer."""
+    parser = argparse.ArgumentParser(
+            description="Plays a recorded minesweeper game back.")
+    parser.add_argument("log", help="replay log file")
+    parser.add_argument("--speed", type=int, default=1,
+                        help="initial playback speed, from 1 to 1000")
+    args = parser.parse_args()
+
+    try:
+        viewer.ReplayViewer(args.log, speed=args.speed).play()
+    finally:
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
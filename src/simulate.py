@@ -0,0 +1,139 @@
+#!/usr/bin/python3
+import argparse
+import itertools
+import json
+import sys
+import time
+
+from utils import settings
+from utils import simulation
+
+
+def parse_args(argv=None):
+    """Parses the command line.
+
+    Args:
+        argv: Optional list of arguments, defaults to sys.argv.
+
+    Returns:
+        The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+            description="Plays minesweeper games headless with the solver "
+                        "over a grid of board parameters, on all the "
+                        "cores.")
+    parser.add_argument("--rows", type=int, nargs="+",
+                        default=[settings.DEFAULT_ROWS],
+                        help="numbers of rows")
+    parser.add_argument("--cols", type=int, nargs="+",
+                        default=[settings.DEFAULT_COLUMNS],
+                        help="numbers of columns")
+    parser.add_argument("--bombs", type=int, nargs="+",
+                        default=[settings.DEFAULT_BOMBS],
+                        help="numbers of bombs")
+    parser.add_argument("--seconds", type=int, nargs="+",
+                        help="time limits, none by default")
+    parser.add_argument("--games", type=int, default=1000,
+                        help="games of every combination")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first game of every combination")
+    parser.add_argument("--workers", type=int,
+                        help="worker processes, one per core by default")
+    parser.add_argument("--batch", type=int, default=500,
+                        help="games a worker plays before reporting")
+    parser.add_argument("--moves-per-second", type=int, default=2,
+                        help="pace of the player against the timer")
+    parser.add_argument("--output",
+                        help="JSON file the results are written to")
+    args = parser.parse_args(argv)
+
+    for rows in args.rows:
+        if not settings.validate_rows(rows):
+            parser.error(f"--rows must be between {settings.MIN_ROWS} "
+                         f"and {settings.MAX_ROWS}")
+    for cols in args.cols:
+        if not settings.validate_cols(cols):
+            parser.error(f"--cols must be between {settings.MIN_COLUMNS} "
+                         f"and {settings.MAX_COLUMNS}")
+    for seconds in args.seconds or ():
+        if not settings.validate_seconds(seconds):
+            parser.error(f"--seconds must be at least {settings.MIN_SECONDS}")
+    if args.games < 1 or args.batch < 1 or args.moves_per_second < 1:
+        parser.error("--games, --batch and --moves-per-second must be "
+                     "positive")
+    return args
+
+
+def parameter_grid(args):
+    """Lists every combination of the board parameters.
+
+    Combinations with more bombs than cells are skipped.
+
+    Args:
+        args: Parsed command line arguments.
+
+    Returns:
+        A list of (rows, columns, bombs, seconds) tuples.
+    """
+    return [(rows, cols, bombs, seconds)
+            for rows, cols, bombs, seconds in itertools.product(
+                    args.rows, args.cols, args.bombs,
+                    args.seconds or [None])
+            if settings.validate_bombs(bombs, rows, cols)]
+
+
+def describe(parameters, totals):
+    """Formats the running totals of a combination on one line."""
+    rows, cols, bombs, seconds = parameters
+    summary = totals.summary()
+    limit = f"{seconds}s" if seconds is not None else "-"
+    return (f"{rows:>5}x{cols:<5} {bombs:>6} {limit:>6} "
+            f"{summary['games']:>9} {summary['win_rate']:8.2%} "
+            f"{summary['moves_per_game']:9.1f} "
+            f"{summary['guesses_per_game']:8.2f} "
+            f"{summary['mean_cascade']:8.1f} "
+            f"{summary['largest_cascade']:8d} "
+            f"{summary['ms_per_game']:9.3f}")
+
+
+def main(argv=None):
+    """Runs the simulation and reports the totals as they come.
+
+    Args:
+        argv: Optional list of arguments, defaults to sys.argv.
+
+    Returns:
+        The process exit code.
+    """
+    args = parse_args(argv)
+    grid = parameter_grid(args)
+    if not grid:
+        print("No combination has fewer bombs than cells.")
+        return 1
+
+    print(f"{'board':>11} {'bombs':>6} {'limit':>6} {'games':>9} "
+          f"{'won':>8} {'moves':>9} {'guesses':>8} {'cascade':>8} "
+          f"{'largest':>8} {'ms/game':>9}")
+    start = time.perf_counter()
+    results = {}
+    for parameters, totals in simulation.simulate(
+            grid, args.games, seed=args.seed, workers=args.workers,
+            batch=args.batch, moves_per_second=args.moves_per_second):
+        results[parameters] = totals
+        print(describe(parameters, totals), flush=True)
+    spent = time.perf_counter() - start
+    games = sum(totals.games for totals in results.values())
+    print(f"{games} games in {spent:.1f} s, {games / spent:.0f} games/s")
+
+    if args.output:
+        report = [dict(zip(("rows", "columns", "bombs", "seconds"),
+                           parameters), **totals.summary())
+                  for parameters, totals in results.items()]
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+import pygame
+import utils.engine as engine
+import utils.game as game
+import utils.info_board as info_board
+
+
+class App:
+    """Application shell owning the pygame session and the window.
+
+    Runs the settings screen and the game as scenes of a single
+    pygame session. pygame is initialised once, every scene resizes
+    the same window instead of opening its own, and the images loaded
+    by the shared asset manager stay valid from one scene to the next,
+    so starting a game involves no teardown.
+
+    Attributes:
+        replay_dir: Optional directory the games are recorded to.
+        no_guess: Whether boards need no guess, see game.Game.
+        first_click: First click mode of the games, see game.Game.
+    """
+
+    def __init__(self, replay_dir=None, no_guess=False,
+                 first_click=engine.FIRST_ANY):
+        """Inits App and the pygame session.
+
+        Args:
+            replay_dir: Optional directory every game is recorded to.
+            no_guess: Whether boards need no guess.
+            first_click: First click mode of the games.
+        """
+        self.replay_dir = replay_dir
+        self.no_guess = no_guess
+        self.first_click = first_click
+        pygame.init()
+        pygame.display.set_caption("Minesweeper")
+
+    def settings(self):
+        """Shows the settings screen.
+
+        Returns:
+            The InfoBoard object with the chosen settings, or None if
+            the window was closed.
+        """
+        board = info_board.InfoBoard()
+        if not board.display_loop():
+            return None
+        return board
+
+    def play(self, settings):
+        """Plays games until the window is closed.
+
+        Args:
+            settings: Object with the rows, columns, bombs, seconds
+                and seed of the board, e.g. an InfoBoard.
+        """
+        game.Game(settings, replay_dir=self.replay_dir,
+                  no_guess=self.no_guess,
+                  first_click=self.first_click).game_loop()
+
+    def run(self, settings=None):
+        """Runs the application and ends the pygame session.
+
+        Args:
+            settings: Optional board settings, the settings screen
+                is shown when omitted.
+        """
+        try:
+            if settings is None:
+                settings = self.settings()
+            if settings is not None:
+                self.play(settings)
+        finally:
+            pygame.quit()
@@ -0,0 +1,249 @@
+import pygame
+import pygame.surfarray
+import numpy as np
+import os
+from collections import OrderedDict
+
+
+def surface_bytes(surface):
+    """Computes the pixel memory of a surface in bytes."""
+    return surface.get_width() * surface.get_height() * \
+        surface.get_bytesize()
+
+
+class LRUCache:
+    """Least recently used cache bounded by the memory of its values.
+
+    Attributes:
+        max_bytes: Memory the cached values may use together.
+        size_of: Callable returning the memory of a value in bytes.
+    """
+
+    def __init__(self, max_bytes, size_of):
+        """Inits LRUCache empty.
+
+        Args:
+            max_bytes: Memory bound of the cache.
+            size_of: Callable returning the memory of a value in bytes.
+        """
+        self.max_bytes = max_bytes
+        self.size_of = size_of
+
+        self._values = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key):
+        """Returns a cached value, marking it as recently used.
+
+        Args:
+            key: Key the value was stored under.
+
+        Returns:
+            The value, or None if it is not cached.
+        """
+        if key not in self._values:
+            return None
+        self._values.move_to_end(key)
+        return self._values[key]
+
+    def put(self, key, value):
+        """Stores a value and evicts the least recently used ones.
+
+        The value just stored is never evicted, even if it does not
+        fit in the bound on its own.
+
+        Args:
+            key: Key to store the value under.
+            value: Value to be cached.
+        """
+        if key in self._values:
+            self._bytes -= self.size_of(self._values.pop(key))
+        self._values[key] = value
+        self._bytes += self.size_of(value)
+
+        while self._bytes > self.max_bytes and len(self._values) > 1:
+            _, evicted = self._values.popitem(last=False)
+            self._bytes -= self.size_of(evicted)
+
+    def clear(self):
+        """Drops every cached value."""
+        self._values.clear()
+        self._bytes = 0
+
+    def __len__(self):
+        """Returns the number of cached values."""
+        return len(self._values)
+
+
+class AssetManager:
+    """Loads the game images once and shares them between screens.
+
+    Every file is read from the assets folder a single time and
+    converted to the display pixel format, so blitting it needs no
+    conversion. Scaled variants are memoized by (name, size) in a
+    least recently used cache bounded by its total pixel memory.
+
+    Attributes:
+        path: Folder the images are read from.
+        max_bytes: Pixel memory the scaled variants may use together.
+    """
+
+    def __init__(self, path=None, max_bytes=32 * 1024 * 1024):
+        """Inits AssetManager with empty caches.
+
+        Args:
+            path: Optional assets folder, defaults to utils/assets.
+            max_bytes: Memory bound of the scaled variants.
+        """
+        if path is None:
+            path = os.path.join(os.path.dirname(__file__), "assets")
+        self.path = path
+        self.max_bytes = max_bytes
+
+        self._images = {}
+        self._scaled = LRUCache(max_bytes, surface_bytes)
+
+    def image(self, name, alpha=False):
+        """Returns an image at its original size.
+
+        Requires the display mode to be set, since the image is
+        converted to its pixel format.
+
+        Args:
+            name: File name of the image, without the .png extension.
+            alpha: Keep the per-pixel transparency of the image, if any.
+
+        Returns:
+            A pygame surface in the display format.
+        """
+        key = (name, alpha)
+        if key not in self._images:
+            surface = pygame.image.load(
+                    os.path.join(self.path, f"{name}.png")
+            )
+            if alpha and surface.get_flags() & pygame.SRCALPHA:
+                surface = surface.convert_alpha()
+            else:
+                surface = surface.convert()
+            self._images[key] = surface
+        return self._images[key]
+
+    def scaled(self, name, size, alpha=False):
+        """Returns an image scaled to a given size.
+
+        Args:
+            name: File name of the image, without the .png extension.
+            size: (width, height) tuple in pixels.
+            alpha: Keep the per-pixel transparency of the image, if any.
+
+        Returns:
+            A pygame surface in the display format.
+        """
+        key = (name, tuple(size), alpha)
+        surface = self._scaled.get(key)
+        if surface is None:
+            surface = pygame.transform.scale(self.image(name, alpha),
+                                             key[1])
+            self._scaled.put(key, surface)
+        return surface
+
+    def clear(self):
+        """Drops every cached image."""
+        self._images.clear()
+        self._scaled.clear()
+
+
+class Atlas:
+    """Sprites packed into a single surface.
+
+    Sprites are laid out on shelves of a texture and drawn with area
+    blits out of it, so drawing many of them is a single batch call
+    on a single source surface. Translucent sprites are flattened
+    over the background color when they are packed.
+
+    Attributes:
+        surface: Surface holding every sprite.
+        index: Dictionary mapping a sprite name to its area in the
+            surface.
+    """
+
+    def __init__(self, sprites, background, width=1024):
+        """Inits Atlas by packing the given sprites.
+
+        Args:
+            sprites: Dictionary mapping names to surfaces.
+            background: RGB color the sprites are drawn over.
+            width: Preferred width of the atlas in pixels.
+        """
+        width = max([width] + [sprite.get_width()
+                               for sprite in sprites.values()])
+        order = sorted(sprites, key=lambda name: sprites[name].get_height(),
+                       reverse=True)
+
+        # Shelf packing, tallest sprites first.
+        self.index = {}
+        x = y = shelf = 0
+        for name in order:
+            w, h = sprites[name].get_size()
+            if x + w > width:
+                x = 0
+                y += shelf
+                shelf = 0
+            self.index[name] = pygame.Rect(x, y, w, h)
+            x += w
+            shelf = max(shelf, h)
+
+        self.surface = pygame.Surface((width, y + shelf)).convert()
+        self.surface.fill(background)
+        self.surface.blits([(sprites[name], self.index[name])
+                            for name in order], doreturn=False)
+
+    def blits(self, target, placements):
+        """Draws sprites on a target surface in a single batch.
+
+        Args:
+            target: Surface to draw on.
+            placements: Iterable of (name, (x, y)) pairs.
+
+        Returns:
+            A list of the rects that were drawn.
+        """
+        return target.blits([(self.surface, dest, self.index[name])
+                             for name, dest in placements])
+
+    def tile_array(self, names):
+        """Copies equally sized sprites into a pixel array.
+
+        Pixels are kept as mapped integers of the atlas format, which
+        is the display format, so they can be written straight into a
+        display surface.
+
+        Args:
+            names: Names of sprites sharing the same size.
+
+        Returns:
+            A NumPy array of shape (len(names), width, height) with the
+            mapped pixels of every sprite, in the given order.
+        """
+        pixels = pygame.surfarray.array2d(self.surface)
+        tiles = []
+        for name in names:
+            area = self.index[name]
+            tiles.append(pixels[area.left:area.right, area.top:area.bottom])
+        return np.stack(tiles)
+
+
+# Manager shared by every screen of the game.
+_MANAGER = None
+
+
+def get_manager():
+    """Returns the asset manager shared by the whole game.
+
+    Returns:
+        The AssetManager instance, created on first use.
+    """
+    global _MANAGER
+    if _MANAGER is None:
+        _MANAGER = AssetManager()
+    return _MANAGER
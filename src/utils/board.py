@@ -0,0 +1,934 @@
+import numpy as np
+from collections import OrderedDict, deque
+
+
+# Cell states.
+HIDDEN = 0
+REVEALED = 1
+FLAG = 2
+QUESTION = 3
+
+# Cell value of a bomb.
+BOMB = -1
+
+# Game states.
+PLAYING = 0
+WON = 1
+LOST = 2
+
+# Side of the square chunks of a ChunkedBoard, in cells.
+CHUNK_SIZE = 64
+
+# Relative positions of the eight neighbours of a cell.
+NEIGHBOURS = ((-1, -1), (-1, 0), (-1, 1),
+              (0, -1), (0, 1),
+              (1, -1), (1, 0), (1, 1))
+
+
+def count_adjacent(mines):
+    """Counts, for every cell, the bombs found in its neighbourhood.
+
+    Pads the mine mask with an empty border and sums up the eight
+    shifted views of it, which is a 3x3 convolution done in a single
+    vectorized pass.
+
+    Args:
+        mines: Boolean array of shape (columns, rows), True for a bomb.
+
+    Returns:
+        An int8 array of the same shape with values in [0, 8].
+    """
+    width, height = mines.shape
+    padded = np.zeros((width + 2, height + 2), dtype=np.int8)
+    padded[1:-1, 1:-1] = mines
+    counts = np.zeros(mines.shape, dtype=np.int8)
+    for dx in range(3):
+        for dy in range(3):
+            if dx == 1 and dy == 1:
+                continue
+            counts += padded[dx:dx + width, dy:dy + height]
+    return counts
+
+
+def label_zero_regions(zeros):
+    """Labels the 8-connected regions of zero cells.
+
+    Links every pair of neighbouring zero cells and labels the
+    regions with connected_labels.
+
+    Args:
+        zeros: Boolean array of shape (columns, rows), True for a cell
+            with no adjacent bombs.
+
+    Returns:
+        An int64 array with one entry per cell, in row-major order of
+        the mask. Zero cells of the same region share the same label,
+        the other cells are labelled -1.
+    """
+    # Number the zero cells compactly, -1 everywhere else.
+    index = np.full(zeros.shape, -1, dtype=np.int64)
+    count = int(zeros.sum())
+    index[zeros] = np.arange(count)
+    pairs = (
+        (np.s_[:-1, :], np.s_[1:, :]),
+        (np.s_[:, :-1], np.s_[:, 1:]),
+        (np.s_[:-1, :-1], np.s_[1:, 1:]),
+        (np.s_[:-1, 1:], np.s_[1:, :-1]),
+    )
+    u = []
+    v = []
+    for first, second in pairs:
+        both = zeros[first] & zeros[second]
+        u.append(index[first][both])
+        v.append(index[second][both])
+    roots = connected_labels(count, np.concatenate(u), np.concatenate(v))
+
+    labels = np.full(zeros.size, -1, dtype=np.int64)
+    labels[zeros.reshape(-1)] = roots
+    return labels
+
+
+def connected_labels(count, u, v):
+    """Labels the connected components of a graph.
+
+    Hooks every edge onto the smaller label and compresses the label
+    pointers until each component points at a single root, all with
+    whole-array operations.
+
+    Args:
+        count: Number of nodes.
+        u: int64 array, first node of every edge.
+        v: int64 array, second node of every edge.
+
+    Returns:
+        An int64 array with one entry per node, the smallest node of
+        its component.
+    """
+    roots = np.arange(count)
+    while True:
+        ru = roots[u]
+        rv = roots[v]
+        differ = ru != rv
+        if not differ.any():
+            return roots
+        # Hook the bigger root onto the smaller one.
+        roots[np.maximum(ru[differ], rv[differ])] = \
+            np.minimum(ru[differ], rv[differ])
+        # Pointer jumping until every label is a root.
+        while True:
+            jumped = roots[roots]
+            if np.array_equal(jumped, roots):
+                break
+            roots = jumped
+
+
+def pack_states(states):
+    """Packs cell states four to a byte.
+
+    Args:
+        states: uint8 array of cell states, all in [0, 3].
+
+    Returns:
+        A uint8 array of a quarter of the size, rounded up.
+    """
+    flat = states.reshape(-1)
+    quads = np.zeros(-(-flat.size // 4) * 4, dtype=np.uint8)
+    quads[:flat.size] = flat
+    quads = quads.reshape(-1, 4)
+    return quads[:, 0] | quads[:, 1] << 2 | quads[:, 2] << 4 | quads[:, 3] << 6
+
+
+def unpack_states(packed, shape):
+    """Unpacks cell states packed by pack_states.
+
+    Args:
+        packed: uint8 array returned by pack_states.
+        shape: Shape of the original states.
+
+    Returns:
+        A uint8 array of the given shape.
+    """
+    shifts = np.array((0, 2, 4, 6), dtype=np.uint8)
+    flat = (packed[:, None] >> shifts & 3).reshape(-1)
+    return flat[:int(np.prod(shape))].reshape(shape)
+
+
+def new_seed():
+    """Draws a random seed for a board.
+
+    Returns:
+        A non-negative integer below 2 ** 63.
+    """
+    return int(np.random.default_rng().integers(2 ** 63))
+
+
+class ZeroRegions:
+    """Index of the connected zero regions of a board and their borders.
+
+    Revealing a zero cell discovers its whole region together with the
+    numbered cells around it. The index keeps, for every region, the
+    flat positions of those cells so a cascade can be applied in bulk.
+    """
+
+    def __init__(self, values):
+        """Inits ZeroRegions from the values of a board.
+
+        Args:
+            values: int8 array of shape (columns, rows) of cell values.
+        """
+        cells = values.size
+        zeros = values == 0
+        self._labels = label_zero_regions(zeros)
+
+        # Pair up every region with its own cells and its border.
+        index = np.arange(cells).reshape(values.shape)
+        keys = [self._labels[zeros.reshape(-1)] * cells + index[zeros]]
+        padded = np.pad(zeros, 1)
+        width, height = values.shape
+        for dx, dy in NEIGHBOURS:
+            source = padded[1 - dx:1 - dx + width, 1 - dy:1 - dy + height]
+            border = source & (values > 0)
+            origin = index[border] - dx * height - dy
+            keys.append(self._labels[origin] * cells + index[border])
+        keys = np.concatenate(keys)
+        keys.sort()
+        unique = np.ones(keys.size, dtype=bool)
+        unique[1:] = keys[1:] != keys[:-1]
+        keys = keys[unique]
+
+        self._regions = keys // cells
+        self._members = keys % cells
+
+    def members(self, flat):
+        """Looks up the cells uncovered by revealing a zero cell.
+
+        Args:
+            flat: Row-major position of a zero cell.
+
+        Returns:
+            An array of row-major positions of the region and its border.
+        """
+        region = self._labels[flat]
+        start = np.searchsorted(self._regions, region, side='left')
+        end = np.searchsorted(self._regions, region, side='right')
+        return self._members[start:end]
+
+
+class Board:
+    """Minesweeper board model kept in compact integer arrays.
+
+    Cells are addressed by (x, y), x being the column and y the row,
+    the same way the game screen lays them out.
+
+    Attributes:
+        columns: Number of columns of the board.
+        rows: Number of rows of the board.
+        bombs: Number of bombs hidden in the board.
+        seed: Seed the bombs are placed from. A random one is drawn
+            when none is given, so every board can be generated again.
+        index_regions: Whether to precompute the zero region index.
+        values: int8 array of shape (columns, rows). -1 marks a bomb,
+            [0, 8] the number of adjacent bombs.
+        states: uint8 array of shape (columns, rows). 0 -> undiscovered,
+            1 -> discovered, 2 -> flag, 3 -> question mark.
+        regions: ZeroRegions index of the board, or None.
+        changed: Row-major positions whose state changed since the
+            last call to take_changes.
+        listeners: Callables handed the row-major positions of every
+            change as it happens, e.g. to keep a solver up to date.
+        flags_placed: Number of cells carrying a flag.
+        bombs_flagged: Number of bombs carrying a flag.
+        revealed: Number of discovered cells that are not bombs.
+        exploded: Whether a bomb was discovered.
+    """
+
+    def __init__(self, columns, rows, bombs, seed=None, index_regions=False):
+        """Inits Board and places the bombs.
+
+        Args:
+            columns: Number of columns of the board.
+            rows: Number of rows of the board.
+            bombs: Number of bombs to place.
+            seed: Optional seed for the bomb placement, drawn at random
+                when omitted.
+            index_regions: Precompute the zero regions of the board so
+                openings can be revealed in a single bulk operation.
+        """
+        self.columns = columns
+        self.rows = rows
+        self.bombs = bombs
+        self.seed = new_seed() if seed is None else seed
+        self.index_regions = index_regions
+
+        self.values = None
+        self.states = None
+        self.regions = None
+        self.changed = []
+        self.listeners = []
+        self.flags_placed = 0
+        self.bombs_flagged = 0
+        self.revealed = 0
+        self.exploded = False
+
+        self.generate()
+
+    def generate(self):
+        """Places the bombs and computes the adjacency counts."""
+        rng = np.random.default_rng(self.seed)
+        cells = self.columns * self.rows
+
+        # Randomly sample out bomb positions.
+        mines = np.zeros(cells, dtype=bool)
+        mines[rng.choice(cells, size=self.bombs, replace=False)] = True
+        mines = mines.reshape(self.columns, self.rows)
+
+        self.values = count_adjacent(mines)
+        self.values[mines] = BOMB
+        self.states = np.zeros((self.columns, self.rows), dtype=np.uint8)
+        self.changed = []
+        self.flags_placed = 0
+        self.bombs_flagged = 0
+        self.revealed = 0
+        self.exploded = False
+        if self.index_regions:
+            self.regions = ZeroRegions(self.values)
+
+    def reveal_region(self, x, y):
+        """Reveals the opening around a zero cell in a single step.
+
+        Only applies when the region index is available and no cell of
+        the opening carries a flag or a question mark, since those stop
+        a regular cascade.
+
+        Args:
+            x: Column of a zero cell.
+            y: Row of a zero cell.
+
+        Returns:
+            True if the opening was revealed, False if the caller has
+            to fall back to a cascade.
+        """
+        if self.regions is None:
+            return False
+        states = self.states.reshape(-1)
+        members = self.regions.members(x * self.rows + y)
+        discovered = states[members]
+        if (discovered > REVEALED).any():
+            return False
+        # Openings never hold bombs.
+        self.revealed += int((discovered == HIDDEN).sum())
+        states[members] = REVEALED
+        self.record_changes(members.tolist())
+        return True
+
+    def cascade(self, x, y):
+        """Discovers a zero cell and the opening around it.
+
+        Uses the zero region index when possible, otherwise walks the
+        opening breadth-first, visiting only the actual neighbours of
+        every cell. Flags and question marks stop the cascade.
+
+        Args:
+            x: Column of a hidden zero cell.
+            y: Row of a hidden zero cell.
+        """
+        # Reveal the whole opening at once if it was indexed.
+        if self.reveal_region(x, y):
+            return
+        # Openings hold no bombs, so only the reveal counter changes.
+        states = memoryview(self.states.reshape(-1))
+        values = memoryview(self.values.reshape(-1))
+        start = x * self.rows + y
+        states[start] = REVEALED
+        opened = [start]
+        queue = deque(opened)
+        while queue:
+            cx, cy = divmod(queue.popleft(), self.rows)
+            for dx, dy in NEIGHBOURS:
+                nx = cx + dx
+                ny = cy + dy
+                if 0 <= nx < self.columns and 0 <= ny < self.rows:
+                    piece = nx * self.rows + ny
+                    if states[piece] == HIDDEN:
+                        states[piece] = REVEALED
+                        opened.append(piece)
+                        if values[piece] == 0:
+                            queue.append(piece)
+        self.revealed += len(opened)
+        self.record_changes(opened)
+
+    def set_state(self, x, y, state):
+        """Changes the state of a cell and records the change.
+
+        Keeps the flag, reveal and bomb counters up to date, so the
+        game state never requires a scan of the board.
+
+        Args:
+            x: Column of the cell.
+            y: Row of the cell.
+            state: New state of the cell.
+        """
+        old = self.state(x, y)
+        bomb = self.value(x, y) == BOMB
+        if old == FLAG:
+            self.flags_placed -= 1
+            self.bombs_flagged -= bomb
+        if state == FLAG:
+            self.flags_placed += 1
+            self.bombs_flagged += bomb
+        if old != REVEALED and state == REVEALED:
+            if bomb:
+                self.exploded = True
+            else:
+                self.revealed += 1
+        self.store_state(x, y, state)
+        self.record_changes([x * self.rows + y])
+
+    def clear_area(self, x, y, neighbours=False):
+        """Moves the bombs out of a cell, and optionally its neighbours.
+
+        Every bomb of the area goes to a random cell outside of it that
+        holds no bomb yet. Only the counts around the moved bombs are
+        updated, the rest of the board stays as generated, so the cost
+        does not depend on the size of the board. The zero region index
+        is dropped once a bomb moved. The destinations are
+        drawn from the seed and the cell, so the same click on the same
+        board always moves the same bombs.
+
+        Args:
+            x: Column of the cell.
+            y: Row of the cell.
+            neighbours: Whether the neighbours are cleared as well, so
+                the cell opens up. Only the cell is cleared when the
+                board is too full for that.
+
+        Returns:
+            The number of bombs moved.
+        """
+        area = [(x, y)]
+        if neighbours:
+            area += self.neighbours(x, y)
+        mines = [cell for cell in area if self.value(*cell) == BOMB]
+        if not mines:
+            return 0
+        cells = self.columns * self.rows
+        if len(mines) > cells - self.bombs - (len(area) - len(mines)):
+            return self.clear_area(x, y) if neighbours else 0
+
+        rng = np.random.default_rng([self.seed, x, y])
+        area = set(area)
+        for cell in mines:
+            while True:
+                target = divmod(int(rng.integers(cells)), self.rows)
+                if target not in area and self.value(*target) != BOMB:
+                    break
+            self.move_bomb(cell, target)
+        # Indexing the openings again would cost a pass over the board,
+        # cascades walk them instead.
+        self.regions = None
+        return len(mines)
+
+    def move_bomb(self, source, target):
+        """Moves a bomb and updates the counts around both cells.
+
+        Flags stay where the player put them, so the flagged bomb count
+        follows the flags of both cells.
+
+        Args:
+            source: (x, y) tuple of a cell holding a bomb.
+            target: (x, y) tuple of a cell holding none.
+        """
+        self.move_flagged(source, target)
+        for cell, step in ((source, -1), (target, 1)):
+            for nx, ny in self.neighbours(*cell):
+                if self.values[nx, ny] != BOMB:
+                    self.values[nx, ny] += step
+        self.values[target] = BOMB
+        self.values[source] = sum(self.values[cell] == BOMB
+                                  for cell in self.neighbours(*source))
+
+    def move_flagged(self, source, target):
+        """Updates the flagged bomb count for a bomb about to move.
+
+        Args:
+            source: (x, y) tuple of the cell the bomb leaves.
+            target: (x, y) tuple of the cell the bomb goes to.
+        """
+        self.bombs_flagged += ((self.state(*target) == FLAG) -
+                               (self.state(*source) == FLAG))
+
+    def record_changes(self, cells):
+        """Records changed cells and hands them to the listeners.
+
+        Args:
+            cells: List of row-major positions.
+        """
+        self.changed.extend(cells)
+        for listener in self.listeners:
+            listener(cells)
+
+    def store_state(self, x, y, state):
+        """Writes the state of a cell, without any bookkeeping.
+
+        Args:
+            x: Column of the cell.
+            y: Row of the cell.
+            state: New state of the cell.
+        """
+        self.states[x, y] = state
+
+    def value(self, x, y):
+        """Returns the value of a cell, in [-1, 8]."""
+        return int(self.values[x, y])
+
+    def state(self, x, y):
+        """Returns the state of a cell, in [0, 3]."""
+        return int(self.states[x, y])
+
+    def marked_cells(self):
+        """Lists the cells that are not undiscovered.
+
+        Returns:
+            An array of row-major positions.
+        """
+        return np.flatnonzero(self.states)
+
+    def keyframe(self):
+        """Captures the state of the game compactly.
+
+        Values are left out since they follow from the seed and the
+        first click. States are kept as the list of the cells that are
+        not undiscovered, or packed two bits a cell once that list
+        would take more room.
+
+        Returns:
+            A dictionary to be handed to restore.
+        """
+        counters = (self.flags_placed, self.bombs_flagged,
+                    self.revealed, self.exploded)
+        flat = self.states.reshape(-1)
+        cells = np.flatnonzero(flat)
+        index = np.min_scalar_type(flat.size)
+        if cells.size * (index.itemsize + 1) > flat.size // 4:
+            return {"packed": pack_states(flat), "counters": counters}
+        return {
+            "cells": cells.astype(index),
+            "marks": flat[cells],
+            "counters": counters,
+        }
+
+    def restore(self, keyframe):
+        """Brings the game back to a captured state.
+
+        Args:
+            keyframe: Dictionary returned by keyframe.
+        """
+        if "packed" in keyframe:
+            self.states[:] = unpack_states(keyframe["packed"],
+                                           self.states.shape)
+        else:
+            self.states.fill(HIDDEN)
+            self.states.reshape(-1)[keyframe["cells"]] = keyframe["marks"]
+        (self.flags_placed, self.bombs_flagged,
+         self.revealed, self.exploded) = keyframe["counters"]
+        self.changed = []
+
+    def status(self):
+        """Tells whether the game is still going on.
+
+        The game is lost once a bomb is discovered. It is won once
+        every bomb carries a flag and no other cell does, or every
+        other cell is discovered.
+
+        Returns:
+            PLAYING, WON or LOST.
+        """
+        if self.exploded:
+            return LOST
+        if (self.bombs_flagged == self.flags_placed == self.bombs or
+                self.revealed == self.columns * self.rows - self.bombs):
+            return WON
+        return PLAYING
+
+    def take_changes(self):
+        """Hands over the cells changed since the previous call.
+
+        Returns:
+            A list of row-major positions, each listed once.
+        """
+        changed = list(dict.fromkeys(self.changed))
+        self.changed = []
+        return changed
+
+    def window(self, x0, y0, x1, y1):
+        """Gives access to a rectangle of cells.
+
+        Args:
+            x0: First column of the rectangle.
+            y0: First row of the rectangle.
+            x1: Column past the last one of the rectangle.
+            y1: Row past the last one of the rectangle.
+
+        Returns:
+            A (values, states) tuple of arrays of shape
+            (x1 - x0, y1 - y0).
+        """
+        return (self.values[x0:x1, y0:y1], self.states[x0:x1, y0:y1])
+
+    def lookup(self, cells):
+        """Reads scattered cells.
+
+        Args:
+            cells: int64 array of row-major positions.
+
+        Returns:
+            A (values, states) tuple of arrays, one entry per cell.
+        """
+        return self.values.reshape(-1)[cells], self.states.reshape(-1)[cells]
+
+    def in_bounds(self, x, y):
+        """Asserts if a position lies on the board.
+
+        Args:
+            x: Column of the position.
+            y: Row of the position.
+
+        Returns:
+            True if the position is a cell of the board.
+        """
+        return 0 <= x < self.columns and 0 <= y < self.rows
+
+    def neighbours(self, x, y):
+        """Lists the positions adjacent to a cell.
+
+        Args:
+            x: Column of the cell.
+            y: Row of the cell.
+
+        Returns:
+            A list of (x, y) tuples of the neighbours on the board.
+        """
+        return [(x + dx, y + dy) for dx, dy in NEIGHBOURS
+                if 0 <= x + dx < self.columns and 0 <= y + dy < self.rows]
+
+
+class ChunkedBoard(Board):
+    """Board generated lazily, one square chunk at a time.
+
+    Bombs are spread over chunks of CHUNK_SIZE x CHUNK_SIZE cells. The
+    number of bombs of every chunk follows from its position alone and
+    the bombs inside a chunk from the seed and that position, so any
+    chunk can be generated on its own, whenever a reveal, a cascade or
+    the screen first needs it. Values of the chunks are kept in a least
+    recently used cache and generated again, identically, once evicted.
+    States are only stored for chunks the player changed, so memory
+    follows the played area instead of the size of the board.
+
+    Attributes:
+        cache_chunks: Number of chunks whose values are cached.
+        values: Always None, see value and window.
+        states: Always None, see state and window.
+    """
+
+    def __init__(self, columns, rows, bombs, seed=None, cache_chunks=1024):
+        """Inits ChunkedBoard without generating any chunk.
+
+        Args:
+            columns: Number of columns of the board.
+            rows: Number of rows of the board.
+            bombs: Number of bombs to place.
+            seed: Optional seed for the bomb placement, drawn at random
+                when omitted.
+            cache_chunks: Number of chunks whose values are cached.
+        """
+        self.cache_chunks = cache_chunks
+        self._chunk_values = OrderedDict()
+        self._chunk_states = {}
+        # Cells of every chunk whose bomb was moved away or moved in.
+        self._moved = {}
+        super().__init__(columns, rows, bombs, seed=seed)
+
+    def generate(self):
+        """Drops every generated chunk and the state of the game."""
+        self._chunk_values.clear()
+        self._chunk_states.clear()
+        self._moved.clear()
+        self.changed = []
+        self.flags_placed = 0
+        self.bombs_flagged = 0
+        self.revealed = 0
+        self.exploded = False
+
+    def _chunk_size(self, cx, cy):
+        """Returns the (width, height) of a chunk, smaller at the edges."""
+        return (min(CHUNK_SIZE, self.columns - cx * CHUNK_SIZE),
+                min(CHUNK_SIZE, self.rows - cy * CHUNK_SIZE))
+
+    def _cells_before(self, cx, cy):
+        """Counts the cells of the chunks coming before a chunk.
+
+        Chunks are ordered by column of chunks, then by row.
+
+        Args:
+            cx: Column of the chunk.
+            cy: Row of the chunk, up to the number of chunk rows.
+
+        Returns:
+            The number of cells.
+        """
+        x = cx * CHUNK_SIZE
+        width = min(CHUNK_SIZE, self.columns - x)
+        return x * self.rows + width * min(cy * CHUNK_SIZE, self.rows)
+
+    def _mines(self, cx, cy):
+        """Places the bombs of a chunk.
+
+        Every chunk receives its share of the cumulative bomb density,
+        rounded down, so the shares add up to exactly the number of
+        bombs of the board. Bombs moved since are moved again.
+
+        Args:
+            cx: Column of the chunk.
+            cy: Row of the chunk.
+
+        Returns:
+            A boolean array of the chunk size, True for a bomb.
+        """
+        cells = self.columns * self.rows
+        before = self._cells_before(cx, cy)
+        after = self._cells_before(cx, cy + 1)
+        quota = self.bombs * after // cells - self.bombs * before // cells
+
+        width, height = self._chunk_size(cx, cy)
+        rng = np.random.default_rng([self.seed, cx, cy])
+        mines = np.zeros(width * height, dtype=bool)
+        mines[rng.choice(width * height, size=quota, replace=False)] = True
+        mines = mines.reshape(width, height)
+        for cell, bomb in self._moved.get((cx, cy), {}).items():
+            mines[cell] = bomb
+        return mines
+
+    def _values(self, cx, cy):
+        """Fetches the values of a chunk, generating them if needed.
+
+        Args:
+            cx: Column of the chunk.
+            cy: Row of the chunk.
+
+        Returns:
+            An int8 array of the chunk size.
+        """
+        key = (cx, cy)
+        values = self._chunk_values.get(key)
+        if values is not None:
+            self._chunk_values.move_to_end(key)
+            return values
+
+        # Bombs of the chunk with a one cell border of its neighbours.
+        width, height = self._chunk_size(cx, cy)
+        x0 = cx * CHUNK_SIZE - 1
+        y0 = cy * CHUNK_SIZE - 1
+        mines = np.zeros((width + 2, height + 2), dtype=bool)
+        for nx in range(max(cx - 1, 0), cx + 2):
+            for ny in range(max(cy - 1, 0), cy + 2):
+                if nx * CHUNK_SIZE >= self.columns or \
+                        ny * CHUNK_SIZE >= self.rows:
+                    continue
+                chunk = self._mines(nx, ny)
+                left = max(nx * CHUNK_SIZE, x0)
+                top = max(ny * CHUNK_SIZE, y0)
+                right = min(nx * CHUNK_SIZE + chunk.shape[0], x0 + width + 2)
+                bottom = min(ny * CHUNK_SIZE + chunk.shape[1],
+                             y0 + height + 2)
+                mines[left - x0:right - x0, top - y0:bottom - y0] = \
+                    chunk[left - nx * CHUNK_SIZE:right - nx * CHUNK_SIZE,
+                          top - ny * CHUNK_SIZE:bottom - ny * CHUNK_SIZE]
+
+        values = count_adjacent(mines)[1:-1, 1:-1]
+        values[mines[1:-1, 1:-1]] = BOMB
+
+        self._chunk_values[key] = values
+        if len(self._chunk_values) > self.cache_chunks:
+            self._chunk_values.popitem(last=False)
+        return values
+
+    def move_bomb(self, source, target):
+        """Moves a bomb and drops the chunks whose counts changed.
+
+        Flags stay where the player put them, so the flagged bomb count
+        follows the flags of both cells.
+
+        Args:
+            source: (x, y) tuple of a cell holding a bomb.
+            target: (x, y) tuple of a cell holding none.
+        """
+        self.move_flagged(source, target)
+        for cell, bomb in ((source, False), (target, True)):
+            cx, ox = divmod(cell[0], CHUNK_SIZE)
+            cy, oy = divmod(cell[1], CHUNK_SIZE)
+            self._moved.setdefault((cx, cy), {})[ox, oy] = bomb
+            for nx, ny in [cell] + self.neighbours(*cell):
+                self._chunk_values.pop((nx // CHUNK_SIZE, ny // CHUNK_SIZE),
+                                       None)
+
+    def value(self, x, y):
+        """Returns the value of a cell, in [-1, 8]."""
+        cx, ox = divmod(x, CHUNK_SIZE)
+        cy, oy = divmod(y, CHUNK_SIZE)
+        return int(self._values(cx, cy)[ox, oy])
+
+    def state(self, x, y):
+        """Returns the state of a cell, in [0, 3]."""
+        cx, ox = divmod(x, CHUNK_SIZE)
+        cy, oy = divmod(y, CHUNK_SIZE)
+        states = self._chunk_states.get((cx, cy))
+        if states is None:
+            return HIDDEN
+        return int(states[ox, oy])
+
+    def store_state(self, x, y, state):
+        """Writes the state of a cell, without any bookkeeping.
+
+        Args:
+            x: Column of the cell.
+            y: Row of the cell.
+            state: New state of the cell.
+        """
+        cx, ox = divmod(x, CHUNK_SIZE)
+        cy, oy = divmod(y, CHUNK_SIZE)
+        key = (cx, cy)
+        if key not in self._chunk_states:
+            self._chunk_states[key] = np.zeros(self._chunk_size(cx, cy),
+                                               dtype=np.uint8)
+        self._chunk_states[key][ox, oy] = state
+
+    def marked_cells(self):
+        """Lists the cells that are not undiscovered.
+
+        Only the chunks the player touched are searched.
+
+        Returns:
+            An array of row-major positions.
+        """
+        cells = [np.empty(0, dtype=np.int64)]
+        for (cx, cy), states in self._chunk_states.items():
+            ox, oy = np.nonzero(states)
+            cells.append((cx * CHUNK_SIZE + ox) * self.rows +
+                         cy * CHUNK_SIZE + oy)
+        return np.concatenate(cells)
+
+    def keyframe(self):
+        """Captures the state of the game compactly.
+
+        Only the chunks the player touched are kept, their states
+        packed two bits a cell.
+
+        Returns:
+            A dictionary to be handed to restore.
+        """
+        return {
+            "chunks": {key: pack_states(states)
+                       for key, states in self._chunk_states.items()},
+            "counters": (self.flags_placed, self.bombs_flagged,
+                         self.revealed, self.exploded),
+        }
+
+    def restore(self, keyframe):
+        """Brings the game back to a captured state.
+
+        Args:
+            keyframe: Dictionary returned by keyframe.
+        """
+        self._chunk_states = {
+                key: unpack_states(packed, self._chunk_size(*key))
+                for key, packed in keyframe["chunks"].items()}
+        (self.flags_placed, self.bombs_flagged,
+         self.revealed, self.exploded) = keyframe["counters"]
+        self.changed = []
+
+    def cascade(self, x, y):
+        """Discovers a zero cell and the opening around it.
+
+        Walks the opening breadth-first across chunk borders,
+        generating the chunks it reaches. Flags and question marks stop
+        the cascade.
+
+        Args:
+            x: Column of a hidden zero cell.
+            y: Row of a hidden zero cell.
+        """
+        self.store_state(x, y, REVEALED)
+        opened = [(x, y)]
+        queue = deque(opened)
+        while queue:
+            cx, cy = queue.popleft()
+            for dx, dy in NEIGHBOURS:
+                nx = cx + dx
+                ny = cy + dy
+                if 0 <= nx < self.columns and 0 <= ny < self.rows:
+                    if self.state(nx, ny) == HIDDEN:
+                        self.store_state(nx, ny, REVEALED)
+                        opened.append((nx, ny))
+                        if self.value(nx, ny) == 0:
+                            queue.append((nx, ny))
+        self.revealed += len(opened)
+        self.record_changes([nx * self.rows + ny for nx, ny in opened])
+
+    def lookup(self, cells):
+        """Reads scattered cells, chunk by chunk.
+
+        Args:
+            cells: int64 array of row-major positions.
+
+        Returns:
+            A (values, states) tuple of arrays, one entry per cell.
+        """
+        values = np.empty(cells.size, dtype=np.int8)
+        states = np.zeros(cells.size, dtype=np.uint8)
+        xs, ys = np.divmod(cells, self.rows)
+        keys = (xs // CHUNK_SIZE) * (self.rows // CHUNK_SIZE + 1) + \
+            ys // CHUNK_SIZE
+        order = np.argsort(keys, kind="stable")
+        bounds = np.flatnonzero(np.diff(keys[order])) + 1
+        for group in np.split(order, bounds):
+            if not group.size:
+                continue
+            cx = int(xs[group[0]]) // CHUNK_SIZE
+            cy = int(ys[group[0]]) // CHUNK_SIZE
+            ox = xs[group] - cx * CHUNK_SIZE
+            oy = ys[group] - cy * CHUNK_SIZE
+            values[group] = self._values(cx, cy)[ox, oy]
+            chunk_states = self._chunk_states.get((cx, cy))
+            if chunk_states is not None:
+                states[group] = chunk_states[ox, oy]
+        return values, states
+
+    def window(self, x0, y0, x1, y1):
+        """Copies out a rectangle of cells.
+
+        Args:
+            x0: First column of the rectangle.
+            y0: First row of the rectangle.
+            x1: Column past the last one of the rectangle.
+            y1: Row past the last one of the rectangle.
+
+        Returns:
+            A (values, states) tuple of arrays of shape
+            (x1 - x0, y1 - y0).
+        """
+        values = np.empty((x1 - x0, y1 - y0), dtype=np.int8)
+        states = np.zeros((x1 - x0, y1 - y0), dtype=np.uint8)
+        for cx in range(x0 // CHUNK_SIZE, -(-x1 // CHUNK_SIZE)):
+            for cy in range(y0 // CHUNK_SIZE, -(-y1 // CHUNK_SIZE)):
+                left = max(cx * CHUNK_SIZE, x0)
+                top = max(cy * CHUNK_SIZE, y0)
+                right = min((cx + 1) * CHUNK_SIZE, x1)
+                bottom = min((cy + 1) * CHUNK_SIZE, y1)
+                target = np.s_[left - x0:right - x0, top - y0:bottom - y0]
+                source = np.s_[left - cx * CHUNK_SIZE:right - cx * CHUNK_SIZE,
+                               top - cy * CHUNK_SIZE:bottom - cy * CHUNK_SIZE]
+                values[target] = self._values(cx, cy)[source]
+                chunk_states = self._chunk_states.get((cx, cy))
+                if chunk_states is not None:
+                    states[target] = chunk_states[source]
+        return values, states
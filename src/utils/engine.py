@@ -0,0 +1,264 @@
+import utils.board as board_model
+
+
+# Player actions, as recorded in replay logs.
+REVEAL = 0
+FLAG = 1
+TICK = 2
+
+# First click modes: the first discovered cell may hold a bomb, is
+# kept free of bombs, or is kept free of bombs with its neighbours so
+# it opens up.
+FIRST_ANY = 0
+FIRST_SAFE = 1
+FIRST_OPENING = 2
+
+# Number of cells up to which the zero regions of a board are worth
+# indexing, see board.ZeroRegions. Indexing costs a few passes over the
+# board, which would slow down the generation of bigger ones.
+INDEX_CELLS = 256 * 1024
+
+# Number of cells from which boards are better generated chunk by
+# chunk, see board.ChunkedBoard.
+CHUNKED_CELLS = 4 * 1024 * 1024
+
+
+class Engine:
+    """Minesweeper rules, free of any display.
+
+    Keeps a board together with the game timer and applies the
+    player's actions to it. The pygame Game only renders an engine
+    and forwards input to it, so games can also be driven from
+    scripts.
+
+    Attributes:
+        board: Board object holding the cells.
+        seconds: Time limit of the game in seconds, None for no limit.
+        time_left: Seconds left until the game is lost, or None.
+        started: Whether the player made an action yet. The timer only
+            runs once the game started.
+        question_marks: Whether marking a flagged cell turns it into a
+            question mark instead of clearing it.
+        first_click: FIRST_ANY, FIRST_SAFE or FIRST_OPENING.
+        clicked: Whether a cell was discovered yet.
+        log: Optional replay log every action that changed the game is
+            recorded to, see utils.replay.
+    """
+
+    def __init__(self, board, seconds=None, question_marks=False,
+                 first_click=FIRST_ANY):
+        """Inits Engine over a freshly generated board.
+
+        Args:
+            board: Board object to be played.
+            seconds: Optional time limit in seconds.
+            question_marks: Cycle flag -> question mark -> undiscovered
+                instead of flag -> undiscovered.
+            first_click: Whether the bombs under the first discovered
+                cell, FIRST_SAFE, or also around it, FIRST_OPENING, are
+                moved elsewhere.
+        """
+        self.board = board
+        self.seconds = seconds
+        self.time_left = seconds
+        self.started = False
+        self.question_marks = question_marks
+        self.first_click = first_click
+        self.clicked = False
+        self.log = None
+
+        # Marking cycle of a cell.
+        if question_marks:
+            self._NEXT_MARK = {
+                    board_model.HIDDEN: board_model.FLAG,
+                    board_model.FLAG: board_model.QUESTION,
+                    board_model.QUESTION: board_model.HIDDEN,
+            }
+        else:
+            self._NEXT_MARK = {
+                    board_model.HIDDEN: board_model.FLAG,
+                    board_model.FLAG: board_model.HIDDEN,
+                    board_model.QUESTION: board_model.HIDDEN,
+            }
+
+    def reveal(self, x, y):
+        """Discovers a cell, cascading over openings.
+
+        The first cell discovered is cleared of bombs beforehand, as
+        the first click mode asks.
+
+        Args:
+            x: Column of the cell.
+            y: Row of the cell.
+
+        Returns:
+            True if the board changed.
+        """
+        if self.state() != board_model.PLAYING:
+            return False
+        if not self.board.in_bounds(x, y):
+            return False
+        self.started = True
+        if self.board.state(x, y) != board_model.HIDDEN:
+            return False
+        if not self.clicked:
+            self.clicked = True
+            if self.first_click != FIRST_ANY:
+                self.board.clear_area(
+                        x, y, neighbours=self.first_click == FIRST_OPENING)
+        if self.board.value(x, y) == 0:
+            self.board.cascade(x, y)
+        else:
+            self.board.set_state(x, y, board_model.REVEALED)
+        if self.log is not None:
+            self.log.record(REVEAL, x, y)
+        return True
+
+    def toggle_flag(self, x, y):
+        """Moves a cell one step through its marking cycle.
+
+        Args:
+            x: Column of the cell.
+            y: Row of the cell.
+
+        Returns:
+            True if the board changed.
+        """
+        if self.state() != board_model.PLAYING:
+            return False
+        if not self.board.in_bounds(x, y):
+            return False
+        self.started = True
+        state = self.board.state(x, y)
+        if state not in self._NEXT_MARK:
+            return False
+        self.board.set_state(x, y, self._NEXT_MARK[state])
+        if self.log is not None:
+            self.log.record(FLAG, x, y)
+        return True
+
+    def tick(self, seconds=1):
+        """Advances the game timer.
+
+        The timer only runs while the game is being played and after
+        the first action.
+
+        Args:
+            seconds: Number of seconds that passed.
+        """
+        if self.time_left is None or not self.started:
+            return
+        if self.state() == board_model.PLAYING:
+            self.time_left = max(0, self.time_left - seconds)
+            if self.log is not None:
+                self.log.record(TICK, seconds, 0)
+
+    def apply(self, action, x, y):
+        """Applies a recorded action.
+
+        Args:
+            action: REVEAL, FLAG or TICK.
+            x: Column of the cell, or the seconds of a tick.
+            y: Row of the cell, unused by ticks.
+
+        Returns:
+            True if the game changed.
+        """
+        if action == REVEAL:
+            return self.reveal(x, y)
+        if action == FLAG:
+            return self.toggle_flag(x, y)
+        if action == TICK:
+            left = self.time_left
+            self.tick(x)
+            return left != self.time_left
+        return False
+
+    def flags_left(self):
+        """Returns the number of flags left to place."""
+        return self.board.bombs - self.board.flags_placed
+
+    def state(self):
+        """Returns the game state: PLAYING, WON or LOST."""
+        if self.time_left is not None and self.time_left <= 0:
+            return board_model.LOST
+        return self.board.status()
+
+    def keyframe(self):
+        """Captures the state of the game, timer included.
+
+        Returns:
+            A dictionary to be handed to restore.
+        """
+        return {
+            "board": self.board.keyframe(),
+            "time_left": self.time_left,
+            "started": self.started,
+            "clicked": self.clicked,
+        }
+
+    def restore(self, keyframe):
+        """Brings the game back to a captured state.
+
+        Args:
+            keyframe: Dictionary returned by keyframe.
+        """
+        self.board.restore(keyframe["board"])
+        self.time_left = keyframe["time_left"]
+        self.started = keyframe["started"]
+        self.clicked = keyframe["clicked"]
+
+    def snapshot(self):
+        """Captures the public state of the game.
+
+        Returns:
+            A dictionary with the board size, the timer, the game state
+            and a copy of the cell states. Values are -2 for cells that
+            are not discovered, otherwise the value of the cell.
+        """
+        board = self.board
+        values, states = board.window(0, 0, board.columns, board.rows)
+        visible = values.copy()
+        visible[states != board_model.REVEALED] = -2
+        return {
+            "columns": board.columns,
+            "rows": board.rows,
+            "bombs": board.bombs,
+            "seed": board.seed,
+            "time_left": self.time_left,
+            "state": self.state(),
+            "flags_left": self.flags_left(),
+            "states": states.copy(),
+            "visible": visible,
+        }
+
+
+def new_game(rows, cols, bombs, seed=None, seconds=None,
+             question_marks=False, index_regions=False, chunked=False,
+             first_click=FIRST_ANY):
+    """Starts a new headless game.
+
+    Args:
+        rows: Number of rows of the board.
+        cols: Number of columns of the board.
+        bombs: Number of bombs to hide.
+        seed: Optional seed for the bomb placement.
+        seconds: Optional time limit in seconds.
+        question_marks: Whether marking cycles through question marks.
+        index_regions: Whether to precompute the zero regions.
+        chunked: Whether to generate the board lazily, chunk by chunk,
+            for boards too big to be held in memory. Zero regions are
+            never indexed then.
+        first_click: FIRST_ANY, FIRST_SAFE or FIRST_OPENING, see
+            Engine.
+
+    Returns:
+        An Engine object ready to be played.
+    """
+    if chunked:
+        board = board_model.ChunkedBoard(cols, rows, bombs, seed=seed)
+    else:
+        board = board_model.Board(cols, rows, bombs, seed=seed,
+                                  index_regions=index_regions)
+    return Engine(board, seconds=seconds, question_marks=question_marks,
+                  first_click=first_click)
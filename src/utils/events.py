@@ -0,0 +1,28 @@
+import pygame
+
+
+def wait_events(deadline=None):
+    """Sleeps until there are events to handle.
+
+    Blocks on the event queue instead of polling it, so an idle
+    window uses no CPU. Returns early once the deadline is reached,
+    e.g. for the next tick of a timer.
+
+    Args:
+        deadline: Optional value of pygame.time.get_ticks, in
+            milliseconds, to return at even if no event arrived.
+
+    Returns:
+        A list with the pending events, possibly empty.
+    """
+    if deadline is None:
+        event = pygame.event.wait()
+    else:
+        timeout = deadline - pygame.time.get_ticks()
+        if timeout <= 0:
+            return pygame.event.get()
+        event = pygame.event.wait(timeout)
+
+    events = [] if event.type == pygame.NOEVENT else [event]
+    events.extend(pygame.event.get())
+    return events
@@ -1,6 +1,15 @@
+import concurrent.futures
 import pygame
-import os
-import random
+import pygame.surfarray
+import numpy as np
+import utils.assets as assets
+import utils.board as board_model
+import utils.engine as engine
+import utils.events as events
+import utils.generator as generator
+import utils.probability as probability
+import utils.replay as replay
+import utils.solver as solver
 
 
 class Game:
@@ -9,9 +18,37 @@ class Game:
     This class takes care of initiating, creating
     and updating the main pygame interface. It imports
     assets and deals with input from user.
+
+    Boards larger than the window are shown through a viewport
+    that scrolls with the arrow keys, the mouse wheel or by
+    dragging with the middle mouse button, while the counters
+    stay pinned at the top. The board zooms in and out with the
+    plus and minus keys or the mouse wheel while holding Ctrl.
+    The H key plays a move the solver proves to be safe and the P key
+    toggles an overlay of the bomb probability of every hidden block.
     """
 
-    def __init__(self, board):
+    # Largest number of blocks shown at once.
+    _MAX_VIEW_COLUMNS = 70
+    _MAX_VIEW_ROWS = 30
+
+    # Zoom factors of the blocks, relative to their default size.
+    _ZOOM_LEVELS = (0.25, 0.5, 0.75, 1, 1.5, 2, 3)
+
+    # Memory the block tiles of the zoom levels may use together.
+    _TILE_CACHE_BYTES = 8 * 1024 * 1024
+
+    # Seconds the probability overlay may take to compute per frame.
+    _PROBABILITY_BUDGET = 0.02
+
+    # Number of cells from which boards are generated chunk by chunk.
+    _CHUNKED_CELLS = engine.CHUNKED_CELLS
+
+    # Number of cells up to which the zero regions are indexed.
+    _INDEX_CELLS = engine.INDEX_CELLS
+
+    def __init__(self, board, frame_cap=30, replay_dir=None, no_guess=False,
+                 first_click=engine.FIRST_ANY):
         """Constructor method that builds up pygame instance.
 
         Establishes the main parameters that will be used
@@ -21,15 +58,82 @@ class Game:
         Args:
             board: Info_Board type object that describes how to build
                 the actual game board.
+            frame_cap: Optional maximum number of frames drawn per
+                second. Frames are only drawn when something changed.
+            replay_dir: Optional directory every game is recorded to,
+                as a replay log, see utils.replay.
+            no_guess: Whether boards are only the ones solved by pure
+                logic from their opening, which is discovered at the
+                start of every game.
+            first_click: engine.FIRST_ANY, FIRST_SAFE or FIRST_OPENING,
+                whether bombs are moved out of the way of the first
+                click.
         """
-        # Main board build-up information.
+        # Main board build-up information, at the default zoom.
         self._BLOCK_WIDTH = 20
         self._BLOCK_HEIGHT = 20
 
-        self.buffer = int((20 * self._BLOCK_WIDTH * board.rows) / 100)
+        # Zoom level, as an index in _ZOOM_LEVELS, and the size of the
+        # blocks on screen at that zoom.
+        self.zoom = self._ZOOM_LEVELS.index(1)
+        self.block_width = self._BLOCK_WIDTH
+        self.block_height = self._BLOCK_HEIGHT
+
+        # Block tiles of the zoom levels used so far, by block size.
+        self._tile_sets = assets.LRUCache(
+                self._TILE_CACHE_BYTES,
+                lambda tile_set: (assets.surface_bytes(tile_set[0].surface) +
+                                  tile_set[1].nbytes)
+        )
 
-        self._BOARD_WIDTH = self._BLOCK_WIDTH * board.columns
-        self._BOARD_HEIGHT = (self._BLOCK_HEIGHT * board.rows) + self.buffer
+        # Blocks visible at once, boards bigger than that scroll.
+        self._VIEW_COLUMNS = min(board.columns, self._MAX_VIEW_COLUMNS)
+        self._VIEW_ROWS = min(board.rows, self._MAX_VIEW_ROWS)
+
+        self.buffer = int((20 * self._BLOCK_WIDTH * self._VIEW_ROWS) / 100)
+
+        # Pixel offset of the visible part of the board.
+        self.scroll = [0, 0]
+
+        self._BOARD_WIDTH = self._BLOCK_WIDTH * self._VIEW_COLUMNS
+        self._BOARD_HEIGHT = ((self._BLOCK_HEIGHT * self._VIEW_ROWS) +
+                              self.buffer)
+
+        # Tiles of the vectorized table drawing, and the tile used for
+        # every (state, value + 1) pair while playing and once revealed.
+        self._TILE_NAMES = (["empty_block", "flag", "question",
+                             "clicked_bomb", "unclicked_bomb"] +
+                            [f"spot_{i}" for i in range(0, 9)])
+        self._PLAY_TILES = np.zeros((4, 10), dtype=np.intp)
+        self._PLAY_TILES[1, 0] = 3  # discovered bomb.
+        self._PLAY_TILES[1, 1:] = np.arange(5, 14)  # numbered pieces.
+        self._PLAY_TILES[2, :] = 1  # flags.
+        self._PLAY_TILES[3, :] = 2  # question marks.
+        self._REVEAL_TILES = np.zeros((4, 10), dtype=np.intp)
+        self._REVEAL_TILES[:, 1:] = np.arange(5, 14)
+        self._REVEAL_TILES[:, 0] = (4, 3, 1, 2)  # bombs by state.
+
+        # Viewport moves, in blocks, of the scrolling keys and, in
+        # viewport heights, of the page keys.
+        self._SCROLL_KEYS = {
+                pygame.K_LEFT: (-1, 0),
+                pygame.K_RIGHT: (1, 0),
+                pygame.K_UP: (0, -1),
+                pygame.K_DOWN: (0, 1),
+        }
+        self._PAGE_KEYS = {
+                pygame.K_PAGEUP: -1,
+                pygame.K_PAGEDOWN: 1,
+        }
+
+        # Zoom level steps of the zooming keys.
+        self._ZOOM_KEYS = {
+                pygame.K_PLUS: 1,
+                pygame.K_EQUALS: 1,
+                pygame.K_KP_PLUS: 1,
+                pygame.K_MINUS: -1,
+                pygame.K_KP_MINUS: -1,
+        }
 
         # Commonly used color codes.
         self._WHITE = (255, 255, 255)
@@ -39,18 +143,45 @@ class Game:
         self._COLUMNS = board.columns
         self._BOMBS = board.bombs
         self._SECONDS = board.seconds
-
-        # Counter information.
-        self._CWIDTH = 2 * self._COLUMNS
+        self._SEED = board.seed
+
+        # Directory of the replay logs, None to record nothing.
+        self.replay_dir = replay_dir
+
+        # What the first click of a game is guaranteed to uncover.
+        self.first_click = first_click
+
+        # Whether boards need no guess, and the generator keeping them
+        # ready in the background while the game loop runs.
+        self.no_guess = no_guess
+        self.generator = None
+
+        # Worker thread building the next board while a game is played,
+        # and the future of that board. The settings of a Game never
+        # change, a new one comes with a new worker.
+        self._preparer = None
+        self._next_board = None
+
+        # Engine of the game being played, and the solver giving hints
+        # on it, set up on the first hint.
+        self.engine = None
+        self.solver = None
+
+        # Counter information. Digits narrow down when the counters
+        # would otherwise run into the smiley face.
+        digits = max(4, len(str(board.bombs)), len(str(board.seconds)))
+        self._CWIDTH = (8 * self._VIEW_COLUMNS) // digits
         self._CHEIGHT = self.buffer - 1
 
         # Smiley face info.
-        self._SMILEY_W = 4 * self._COLUMNS
+        self._SMILEY_W = 4 * self._VIEW_COLUMNS
         self._SMILEY_H = self.buffer - 1
         self._SMILEY_X = (self._BOARD_WIDTH // 2) - (self._SMILEY_W // 2)
         self._SMILEY_Y = 0
 
-        # Pygame init data and maintainance.
+        # Pygame init data and maintainance. Does nothing if the
+        # application shell already initialised pygame, whose window is
+        # then resized.
         pygame.init()
 
         pygame.display.set_caption("Minesweeper")
@@ -60,183 +191,298 @@ class Game:
                  self._BOARD_HEIGHT)
         )
 
-        self._FRAMES = 30
+        # Maximum frames drawn per second, None for no cap.
+        self.frame_cap = frame_cap
 
-        self._CLOCK = pygame.time.Clock()
+        # Whether the probability overlay is shown, and the
+        # probabilities it last drew, until the board changes.
+        self.show_probabilities = False
+        self._estimate = None
 
-    def update_struct(self, pos, board, action):
-        """Updates the board structure according to the player's action.
+    def update_struct(self, pos, action):
+        """Forwards the player's action to the game engine.
 
-        Changes the state of a block in the given structure if
-        that certain block was actioned by the player.
+        Resolves the block under the click and changes its state
+        if that certain block was actioned by the player.
 
         Args:
-            board: Dictionary mapping the game board.
             pos: Click coordinates.
             action: the type of action, e.g. right or left click.
 
         Returns:
-            An updated version of the board dictionary. It
-            showcases the changes made by the players' action.
+            True if the board changed.
         """
-        if pos[1] < self.buffer:
-            return board
-        # Iterate through the list and find the corresponding rect.
-        for item in board.items():
-            if item[1][0].collidepoint(pos):
-                if action == 1 and item[1][2] == 0:
-                    if item[1][1] == 0:
-                        board = self.cascade_effect(item[0], board)
-                    else:
-                        item[1][2] = 1
-                    break
-                if action == 2 and item[1][2] == 0:
-                    item[1][2] = 2
-                    break
-                if action == 2 and item[1][2] == 2:
-                    item[1][2] = 3
-                    break
-                if action == 2 and item[1][2] == 3:
-                    item[1][2] = 0
-                    break
-        return board
-
-    def cascade_effect(self, item, board):
-        """Apply a cascade effect to reveal non-bomb adjacent pieces.
-
-        After the user clicks on a piece with no bombs adjacent, apply
-        this effect to discover all adjacent similar pieces
-        and some pieces that do have bombs adjcent.
+        cell = self.cell_at(pos)
+        if cell is None:
+            return False
+        if action == 1:
+            return self.engine.reveal(*cell)
+        if action == 2:
+            return self.engine.toggle_flag(*cell)
+        return False
+
+    def cell_at(self, pos):
+        """Resolves the block found under a point of the window.
+
+        The block is computed arithmetically from the zoomed block
+        size, the counter buffer and the scroll offset, so the cost
+        does not depend on the size of the board.
 
         Args:
-            item: current spot to be discovered.
-            board: Game board mapped as a dictionary.
+            pos: (x, y) window coordinates, e.g. of a click.
 
         Returns:
-            A modified board dictionary with updated pieces.
+            The (x, y) tuple of the block, or None if the point is
+            outside the board.
         """
-        board[item][2] = 1
-        queue = [item]
-        while len(queue) > 0:
-            # Find all neighbours of item.
-            for piece in board.keys():
-                if (self.is_neighbour(queue[0], piece) and
-                        board[piece][2] == 0):
-                    board[piece][2] = 1
-                    if board[piece][1] == 0:
-                        queue.append(piece)
-            del queue[0]
-        return board
-
-    def is_neighbour(self, xi, xj):
-        """Asserts if two positions are adjacent.
+        if not self.view_area().collidepoint(pos):
+            return None
+        x = (pos[0] + self.scroll[0]) // self.block_width
+        y = (pos[1] - self.buffer + self.scroll[1]) // self.block_height
+        if not (0 <= x < self._COLUMNS and 0 <= y < self._ROWS):
+            return None
+        return (x, y)
+
+    def create_game_structure(self, seed=None):
+        """Create the game engine associated with the game board.
+
+        Builds a board that keeps, for every (i, j in {1, n}) position,
+        a value in [-1, 8] and a state: 0 -> undiscovered,
+        1 -> discoverd, 2 -> flag, 3 -> question mark.
+        -1 -> a bomb.
+        [0, 8] -> the number of adjacent bombs.
+        Boards of _CHUNKED_CELLS cells or more are generated lazily,
+        one chunk at a time, so they fit in memory. Only boards of up
+        to _INDEX_CELLS cells index their zero regions.
 
         Args:
-            Xi: first position tuple
-            Xj: second position tuple
+            seed: Optional seed of the board, drawn at random when
+                omitted.
 
         Returns:
-            A boolean value. True if the positions
-                are adjacent. False otherwise.
+            An Engine object playing a new board.
         """
-        # line/row adjacent.
-        if xi[0] - 1 == xj[0] and xi[1] == xj[1]:
-            return True
+        cells = self._ROWS * self._COLUMNS
+        return engine.new_game(self._ROWS, self._COLUMNS, self._BOMBS,
+                               seed=seed, seconds=self._SECONDS,
+                               question_marks=True,
+                               index_regions=cells <= self._INDEX_CELLS,
+                               chunked=cells >= self._CHUNKED_CELLS,
+                               first_click=self.first_click)
+
+    def prepare_board(self, seed=None):
+        """Builds the engine of a new game, before it is started.
 
-        if xi[0] + 1 == xj[0] and xi[1] == xj[1]:
-            return True
+        Without a seed, no-guess games take the next board of the
+        generator.
 
-        # column adjcent.
-        if xi[1] - 1 == xj[1] and xi[0] == xj[0]:
-            return True
+        Args:
+            seed: Optional seed of the board, drawn at random when
+                omitted.
 
-        if xi[1] + 1 == xj[1] and xi[0] == xj[0]:
-            return True
+        Returns:
+            An (engine, start) tuple, start being the opening of a
+            no-guess board, or None.
+        """
+        start = None
+        if self.generator is not None and seed is None:
+            seed, start = self.generator.get()
+        return self.create_game_structure(seed), start
 
-        # cross adjacent.
-        if xi[0] - 1 == xj[0] and xi[1] - 1 == xj[1]:
-            return True
+    def await_board(self, future, seed=None):
+        """Waits for a board built on the worker thread.
 
-        if xi[0] - 1 == xj[0] and xi[1] + 1 == xj[1]:
-            return True
+        Window events keep being pumped meanwhile, so the window does
+        not freeze. When it is closed before the board is ready, a
+        plain board is built at once, the quit event being left for the
+        game loop. A plain board is built as well when the worker
+        failed, e.g. once the generator is closed.
 
-        if xi[0] + 1 == xj[0] and xi[1] + 1 == xj[1]:
-            return True
+        Args:
+            future: Future of a prepare_board call.
+            seed: Optional seed the board was asked for.
 
-        if xi[0] + 1 == xj[0] and xi[1] - 1 == xj[1]:
-            return True
+        Returns:
+            An (engine, start) tuple, as returned by prepare_board.
+        """
+        while True:
+            try:
+                return future.result(timeout=0.05)
+            except concurrent.futures.TimeoutError:
+                pass
+            except Exception as exp:
+                print("Exception raised when preparing a board", repr(exp))
+                return self.create_game_structure(seed), None
+            if pygame.event.peek(pygame.QUIT):
+                return self.create_game_structure(seed), None
+            pygame.event.pump()
+
+    def start_game(self, seed=None):
+        """Sets up a new game, recording it if a replay directory is set.
+
+        The log of the previous game, if any, is closed. Without a
+        seed, the board built in the background during the previous
+        game is swapped in, and the board of the next game is started
+        in the background. Boards are built on the worker thread once
+        the game loop runs, so waiting for the generator never blocks
+        the window. The opening of a no-guess game is discovered once
+        it is recorded.
 
+        Args:
+            seed: Optional seed of the board, drawn at random when
+                omitted.
+        """
+        if self.engine is not None and self.engine.log is not None:
+            self.engine.log.close()
+        if self.solver is not None:
+            self.solver.close()
+            self.solver = None
+        prepared = self._next_board
+        self._next_board = None
+        if seed is None and prepared is not None:
+            self.engine, start = self.await_board(prepared)
+        elif self._preparer is not None:
+            # A board prepared for no seed in particular is left to
+            # finish and dropped.
+            self.engine, start = self.await_board(
+                    self._preparer.submit(self.prepare_board, seed), seed)
+        else:
+            self.engine, start = self.prepare_board(seed)
+        self._estimate = None
+        self.engine.board.listeners.append(self.forget_estimate)
+        if self._preparer is not None:
+            self._next_board = self._preparer.submit(self.prepare_board)
+        if self.replay_dir is not None:
+            replay.record(self.engine, replay.log_path(
+                    self.replay_dir, self.engine.board.seed))
+        if self.no_guess:
+            generator.open_start(self.engine, start)
+
+    def hint(self):
+        """Plays a move the solver proves to be certain.
+
+        Discovers a cell free of bombs or, when there is none, flags a
+        cell holding one.
+
+        Returns:
+            True if the board changed.
+        """
+        if self.solver is None:
+            self.solver = solver.Solver(self.engine.board)
+        safe, mines = self.solver.moves()
+        for x, y in safe:
+            if self.engine.reveal(x, y):
+                return True
+        for x, y in mines:
+            if self.engine.board.state(x, y) == board_model.HIDDEN:
+                return self.engine.toggle_flag(x, y)
         return False
 
-    def bomb_distance(self, pos, bombs):
-        """Finds out how many bombs are adjacent with a position.
+    def block_position(self, x, y):
+        """Computes the top-left corner of a block on the screen.
 
-        Looks up in vecinity of a given position and determines the
-        number of adjacent bombs.
+        Args:
+            x: Column of the block.
+            y: Row of the block.
+
+        Returns:
+            A (left, top) tuple in window coordinates.
+        """
+        return (x * self.block_width - self.scroll[0],
+                y * self.block_height + self.buffer - self.scroll[1])
+
+    def view_area(self):
+        """Returns the rect of the window showing the board."""
+        return pygame.Rect(0, self.buffer,
+                           self._VIEW_COLUMNS * self._BLOCK_WIDTH,
+                           self._VIEW_ROWS * self._BLOCK_HEIGHT)
+
+    def visible_blocks(self):
+        """Finds the blocks that are, even partially, in the viewport.
+
+        Returns:
+            A (x0, y0, x1, y1) tuple, the visible blocks being the
+            columns in [x0, x1) and the rows in [y0, y1).
+        """
+        area = self.view_area()
+        x0 = self.scroll[0] // self.block_width
+        y0 = self.scroll[1] // self.block_height
+        x1 = -(-(self.scroll[0] + area.w) // self.block_width)
+        y1 = -(-(self.scroll[1] + area.h) // self.block_height)
+        return (x0, y0, min(x1, self._COLUMNS), min(y1, self._ROWS))
+
+    def scroll_by(self, dx, dy):
+        """Moves the viewport over the board.
+
+        The viewport never leaves the board.
 
         Args:
-            pos: tuple (i, j)
-            bombs: list of positions of bombs.
+            dx: Horizontal offset in pixels.
+            dy: Vertical offset in pixels.
 
         Returns:
-            An integer in [0, 8] which represents the number
-                of adjacent bombs.
+            True if the viewport moved.
         """
-        adjacent = 0
-        for bomb in bombs:
-            if self.is_neighbour(pos, bomb):
-                adjacent += 1
-        return adjacent
-
-    def create_game_structure(self):
-        """Create a dictionary associated with the game board.
-
-        Builds a dictionary that associates the (i, j in {1, n})
-        tuple position to a list consisting of a rect with the x, y
-        positions properly placed, a value in [-1, 8] and 0 -> undiscovered,
-        1 -> discoverd, 2 -> flag, 3 -> question mark, 4 -> bomb.
-        -1 -> a bomb.
-        [0, 8] -> the number of adjacent bombs.
+        area = self.view_area()
+        limit_x = self._COLUMNS * self.block_width - area.w
+        limit_y = self._ROWS * self.block_height - area.h
+        scroll = [max(0, min(limit_x, self.scroll[0] + dx)),
+                  max(0, min(limit_y, self.scroll[1] + dy))]
+        if scroll == self.scroll:
+            return False
+        self.scroll = scroll
+        return True
+
+    def set_zoom(self, zoom):
+        """Switches the blocks to a zoom level.
+
+        Only the block geometry and the tiles in use change, the board
+        itself is left untouched.
+
+        Args:
+            zoom: Index of the level in _ZOOM_LEVELS.
+        """
+        factor = self._ZOOM_LEVELS[zoom]
+        self.zoom = zoom
+        self.block_width = max(1, round(self._BLOCK_WIDTH * factor))
+        self.block_height = max(1, round(self._BLOCK_HEIGHT * factor))
+        self.block_atlas, self._TILES = self.tile_set()
+
+    def zoom_by(self, steps, anchor=None):
+        """Zooms the board in or out.
+
+        The point of the board found under the anchor stays in place,
+        as far as the viewport may be scrolled.
+
+        Args:
+            steps: Number of zoom levels to move, positive to zoom in.
+            anchor: Optional (x, y) window point to zoom around,
+                defaults to the center of the viewport.
 
         Returns:
-            A dictionary with tuple -> tuple association.
+            True if the zoom level changed.
         """
-        board_structure = dict()
-
-        rows = list(range(0, self._COLUMNS))
-        cols = list(range(0, self._ROWS))
-        positions = [(x, y) for x in rows for y in cols]
-
-        # Randomly sample out bomb positions.
-        bomb_positions = random.sample(positions, self._BOMBS)
-
-        not_bombs = [(x, y) for (x, y) in positions
-                     if (x, y) not in bomb_positions]
-
-        # Place bomb positions in the dictionary.
-        for bomb_pos in bomb_positions:
-            rect = pygame.Rect(
-                    bomb_pos[0] * self._BLOCK_WIDTH,
-                    bomb_pos[1] * self._BLOCK_HEIGHT + self.buffer,
-                    self._BLOCK_WIDTH,
-                    self._BLOCK_HEIGHT
-            )
-            board_structure[bomb_pos] = [rect, -1, 0]
-
-        # Place remaining positions in the dictionary.
-        for pos in not_bombs:
-            rect = pygame.Rect(
-                    pos[0] * self._BLOCK_WIDTH,
-                    pos[1] * self._BLOCK_HEIGHT + self.buffer,
-                    self._BLOCK_WIDTH,
-                    self._BLOCK_HEIGHT,
-            )
-            board_structure[pos] = [rect,
-                                    self.bomb_distance(pos, bomb_positions),
-                                    0]
-        return board_structure
-
-    def draw_bomb_counter(self, board, flag_nr, scores):
+        zoom = max(0, min(len(self._ZOOM_LEVELS) - 1, self.zoom + steps))
+        if zoom == self.zoom:
+            return False
+        area = self.view_area()
+        if anchor is None or not area.collidepoint(anchor):
+            anchor = area.center
+
+        # Board point under the anchor, in blocks.
+        left = anchor[0] - area.x
+        top = anchor[1] - area.y
+        x = (self.scroll[0] + left) / self.block_width
+        y = (self.scroll[1] + top) / self.block_height
+
+        self.set_zoom(zoom)
+        self.scroll = [round(x * self.block_width) - left,
+                       round(y * self.block_height) - top]
+        # Bring the viewport back over the board.
+        self.scroll_by(0, 0)
+        return True
+
+    def draw_bomb_counter(self, board, flag_nr):
         """Displays the number of bombs supposedly captured by the player.
 
         On the left side of the board, it will display an image
@@ -248,7 +494,6 @@ class Game:
         Args:
             board: Pygame type object used to display images.
             flag_nr: The number of flags left to place.
-            scores: An array of pygame type images.
         """
         flag_list = []
         if flag_nr < 10:
@@ -261,14 +506,13 @@ class Game:
                 flag_list.insert(0, flag_nr % 10)
                 flag_nr //= 10
 
-        # Display each element in the list.
-        x = 0
-        for val in flag_list:
-            rect = pygame.Rect(x, 0, self._CWIDTH, self._CHEIGHT)
-            board.blit(scores[val], rect)
-            x += self._CWIDTH
+        # Display each element in the list, left to right.
+        self.atlas.blits(board, [
+                (f"score_{val}", (i * self._CWIDTH, 0))
+                for i, val in enumerate(flag_list)
+        ])
 
-    def draw_time_counter(self, board, time, scores):
+    def draw_time_counter(self, board, time):
         """Displays the time counter.
 
         On the upper right side of the screen, display a
@@ -279,290 +523,476 @@ class Game:
         Args:
             board: Pygame type object used to display images.
             time: Time to be displayed in seconds.
-            scores: An array of pygame type images.
         """
         time_list = []
         while time > 0:
             time_list.append(time % 10)
             time //= 10
 
-        x = self._BOARD_WIDTH - self._CWIDTH
-        for val in time_list:
-            rect = pygame.Rect(x, 0, self._CWIDTH, self._CHEIGHT)
-            board.blit(scores[val], rect)
-            x -= self._CWIDTH
+        # Display each digit, right to left.
+        right = self._BOARD_WIDTH - self._CWIDTH
+        self.atlas.blits(board, [
+                (f"score_{val}", (right - i * self._CWIDTH, 0))
+                for i, val in enumerate(time_list)
+        ])
+
+    def block_image(self, state, value, game_state):
+        """Chooses the image of a block.
+
+        Args:
+            state: State of the block, in [0, 3].
+            value: Value of the block, in [-1, 8].
+            game_state: 0 while playing, 1 or 2 once the table is
+                revealed.
+
+        Returns:
+            The name of the atlas sprite to be drawn for the block.
+        """
+        if game_state == 0:
+            if state == 0:  # if it was not discovered.
+                return "empty_block"
+            if state == 2:
+                return "flag"
+            if state == 3:
+                return "question"
+            # if discovered, replace with numbered piece or bomb
+            if value > -1:
+                return f"spot_{value}"
+            return "clicked_bomb"
+        # defeat/reveal
+        if value > -1:
+            return f"spot_{value}"
+        if state == 1:
+            return "clicked_bomb"
+        if state == 0:
+            return "unclicked_bomb"
+        if state == 2:
+            return "flag"
+        return "question"
+
+    def draw_blocks(self, board, game_state, cells=None):
+        """Draws blocks of the table.
+
+        All the blocks are sent to the display in a single batch of
+        area blits from the sprite atlas.
+
+        Args:
+            board: Board object mapping the game board.
+            game_state: The current game state.
+            cells: Row-major positions of the blocks to draw. All the
+                visible blocks are drawn when omitted.
+
+        Returns:
+            A list of the rects that were drawn.
+        """
+        x0, y0, x1, y1 = self.visible_blocks()
+        values, states = board.window(x0, y0, x1, y1)
+        if cells is None:
+            cells = [x * self._ROWS + y
+                     for x in range(x0, x1) for y in range(y0, y1)]
+        placements = []
+        for cell in cells:
+            x, y = divmod(cell, self._ROWS)
+            # Blocks out of the viewport are not drawn.
+            if not (x0 <= x < x1 and y0 <= y < y1):
+                continue
+            placements.append((
+                    self.block_image(states.item(x - x0, y - y0),
+                                     values.item(x - x0, y - y0),
+                                     game_state),
+                    self.block_position(x, y)
+            ))
+        # Keep partially visible blocks off the counters.
+        self._BOARD.set_clip(self.view_area())
+        rects = self.block_atlas.blits(self._BOARD, placements)
+        self._BOARD.set_clip(None)
+        return rects
+
+    def draw_board(self, board, game_state):
+        """Draws the whole visible table in one step.
+
+        Picks the tile of every block with a table lookup on the state
+        and value arrays and writes all the tiles into the window pixels
+        at once through pygame.surfarray, instead of blitting every block
+        on its own.
+
+        Args:
+            board: Board object mapping the game board.
+            game_state: The current game state.
+
+        Returns:
+            The rect of the window that was drawn.
+        """
+        x0, y0, x1, y1 = self.visible_blocks()
+        values, states = board.window(x0, y0, x1, y1)
+        lookup = self._PLAY_TILES if game_state == 0 else self._REVEAL_TILES
+        tiles = self._TILES[lookup[states, values + 1]]
+
+        # (columns, rows, width, height) -> (pixels wide, pixels high)
+        columns, rows, width, height = tiles.shape
+        image = tiles.transpose(0, 2, 1, 3).reshape(columns * width,
+                                                    rows * height)
+
+        # Crop the blocks cut by the edges of the viewport. Zoomed out
+        # boards may also end before the viewport does.
+        area = self.view_area()
+        left = self.scroll[0] - x0 * width
+        top = self.scroll[1] - y0 * height
+        image = image[left:left + area.w, top:top + area.h]
+        area.size = image.shape
+
+        pixels = pygame.surfarray.pixels2d(self._BOARD.subsurface(area))
+        pixels[...] = image
+        # Release the lock held on the window surface.
+        del pixels
+        return area
+
+    def draw_table(self, board, game_state, redraw_all, redraw_view):
+        """Draws what changed on the table since the previous frame.
+
+        Redraws the whole window only when it was invalidated, the
+        viewport only when it moved, otherwise only the pieces that
+        changed.
+
+        Args:
+            board: Board object mapping the game board.
+            game_state: The current game state.
+            redraw_all: Whether the whole window has to be redrawn.
+            redraw_view: Whether the viewport has to be redrawn.
+
+        Returns:
+            A list of the rects that were drawn.
+        """
+        if redraw_all:
+            self._BOARD.fill(self._WHITE)
+            board.take_changes()
+            self.draw_board(board, game_state)
+            return [self._BOARD.get_rect()]
+        if redraw_view:
+            board.take_changes()
+            return [self.draw_board(board, game_state)]
+        return self.draw_blocks(board, game_state, board.take_changes())
+
+    def handle_view_event(self, event):
+        """Scrolls and zooms the board following the player's input.
+
+        Args:
+            event: pygame event to handle.
+
+        Returns:
+            A (redraw_all, redraw_view) tuple telling whether the whole
+            window or the viewport have to be redrawn.
+        """
+        redraw_all = False
+        redraw_view = False
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            redraw_all = True
+        # Move the viewport around the board.
+        if event.type == pygame.KEYDOWN and event.key in self._SCROLL_KEYS:
+            dx, dy = self._SCROLL_KEYS[event.key]
+            redraw_view |= self.scroll_by(dx * self.block_width,
+                                          dy * self.block_height)
+        if event.type == pygame.KEYDOWN and event.key in self._PAGE_KEYS:
+            redraw_view |= self.scroll_by(
+                    0, self._PAGE_KEYS[event.key] * self.view_area().h)
+        if event.type == pygame.MOUSEWHEEL and \
+                not pygame.key.get_mods() & pygame.KMOD_CTRL:
+            redraw_view |= self.scroll_by(-3 * event.x * self.block_width,
+                                          -3 * event.y * self.block_height)
+        # Zoom around the view center or the mouse pointer. The table
+        # is redrawn whole since its extent changed.
+        if event.type == pygame.KEYDOWN and event.key in self._ZOOM_KEYS:
+            redraw_all |= self.zoom_by(self._ZOOM_KEYS[event.key])
+        if event.type == pygame.MOUSEWHEEL and \
+                pygame.key.get_mods() & pygame.KMOD_CTRL:
+            redraw_all |= self.zoom_by(event.y, pygame.mouse.get_pos())
+        if event.type == pygame.MOUSEMOTION and event.buttons[1]:
+            redraw_view |= self.scroll_by(-event.rel[0], -event.rel[1])
+        return redraw_all, redraw_view
+
+    def forget_estimate(self, cells):
+        """Drops the probabilities of the overlay once the board changed.
+
+        Args:
+            cells: Row-major positions of the changed cells.
+        """
+        self._estimate = None
 
+    def draw_probabilities(self, board):
+        """Marks the visible hidden blocks with their bomb probability.
+
+        Every hidden block gets a square going from green, certainly
+        safe, to red, certainly a bomb. Probabilities are exact unless
+        they take longer than _PROBABILITY_BUDGET to compute. They are
+        only computed again once the board changed.
+
+        Args:
+            board: Board object mapping the game board.
+
+        Returns:
+            A list with the rect of the viewport.
+        """
+        if self._estimate is None or self._estimate[0] is not board:
+            self._estimate = (board, probability.mine_probabilities(
+                    board, budget=self._PROBABILITY_BUDGET))
+        estimate = self._estimate[1]
+        x0, y0, x1, y1 = self.visible_blocks()
+        grid = estimate.window(x0, y0, x1, y1)
+        width = max(1, self.block_width // 2)
+        height = max(1, self.block_height // 2)
+        area = self.view_area()
+        self._BOARD.set_clip(area)
+        for x, y in np.argwhere(~np.isnan(grid)).tolist():
+            chance = float(grid[x, y])
+            left, top = self.block_position(x0 + x, y0 + y)
+            self._BOARD.fill((round(255 * chance), round(255 * (1 - chance)),
+                              0),
+                             (left + width // 2, top + height // 2,
+                              width, height))
+        self._BOARD.set_clip(None)
+        return [area]
+
+    def draw_hud(self, flag_nr, time, game_state):
+        """Redraws the counters and the smiley face.
+
+        Args:
+            flag_nr: The number of flags left to place.
+            time: Time to be displayed in seconds.
+            game_state: The current game state.
+
+        Returns:
+            A list with the rect of the counter area.
+        """
+        hud_rect = pygame.Rect(0, 0, self._BOARD_WIDTH, self.buffer)
+        self._BOARD.fill(self._WHITE, hud_rect)
+
+        # Draw bomb/flag counter.
+        self.draw_bomb_counter(self._BOARD, flag_nr)
+
+        # Draw time counter.
+        self.draw_time_counter(self._BOARD, time)
+
+        # Draw smiley face.
+        smiley = ("smiley", "smiley_cool", "smiley_rip")[game_state]
+        self.atlas.blits(self._BOARD,
+                         [(smiley, (self._SMILEY_X, self._SMILEY_Y))])
+
+        return [hud_rect]
+
+    def tile_set(self):
+        """Fetches the block tiles of the current zoom level.
+
+        Tiles are scaled the first time a zoom level is used and kept
+        in a least recently used cache bounded by their memory, so
+        zooming back and forth never scales the images again.
+
+        Returns:
+            An (atlas, tiles) tuple, the Atlas of the block sprites at
+            the zoomed size and the pixel array of _TILE_NAMES.
+        """
+        block = (self.block_width, self.block_height)
+        tile_set = self._tile_sets.get(block)
+        if tile_set is not None:
+            return tile_set
+
+        manager = assets.get_manager()
+        sprites = {
+                # Empty hidden block.
+                "empty_block": manager.scaled("empty-block", block),
+                # Bombs.
+                "clicked_bomb": manager.scaled("bomb-at-clicked-block",
+                                               block),
+                "unclicked_bomb": manager.scaled("unclicked-bomb", block),
+                # Flags.
+                "flag": manager.scaled("flag", block),
+                "flag_wrong": manager.scaled("wrong-flag", block),
+                "question": manager.scaled("question", block),
+        }
+        # Spot places.
+        for i in range(0, 9):
+            sprites[f"spot_{i}"] = manager.scaled(f"{i}", block, alpha=True)
+        # Everything is drawn over the white background.
+        atlas = assets.Atlas(sprites, self._WHITE)
+        tile_set = (atlas, atlas.tile_array(self._TILE_NAMES))
+        self._tile_sets.put(block, tile_set)
+        return tile_set
+
+    def load_assets(self):
+        """Fetches the images used to draw the game.
+
+        Packs the counter and smiley sprites into an atlas, fetches
+        the block tiles of the current zoom level and the game icon.
+        The shared asset manager makes sure every image is only loaded
+        and scaled once.
+        """
+        manager = assets.get_manager()
+        counter = (self._CWIDTH, self._CHEIGHT)
+        smiley = (self._SMILEY_W, self._SMILEY_H)
+        try:
+            sprites = {
+                    # Smiley faces.
+                    "smiley": manager.scaled("smiley", smiley),
+                    "smiley_cool": manager.scaled("smiley_cool", smiley),
+                    "smiley_rip": manager.scaled("smiley_rip", smiley),
+            }
+            # Score counters.
+            for i in range(0, 10):
+                sprites[f"score_{i}"] = manager.scaled(f"score_{i}", counter)
+            self.atlas = assets.Atlas(sprites, self._WHITE)
+            self.set_zoom(self.zoom)
+            self.icon = manager.image("icon")
+        except Exception as exp:
+            print("Exception raised when importing assets", exp)
 
     def game_loop(self):
         """Interacts with the player and controls displaying.
 
         Through an infinite loop, provides the player with the
         minesweeper table and responds appropriately to their
-        actions. Stops when the player exits the game.
+        actions. The loop sleeps on the event queue and only draws
+        when input, the clock or the game state changed something.
+        Stops when the player exits the game, leaving the pygame
+        session to its owner.
         """
 
         # Import assets.
-        scores = []
-        spots = []
-        try:
-            base_path = os.path.dirname(__file__)
-
-            # Import empty hidden block.
-            empty_block = pygame.image.load(
-                    os.path.join(base_path, "assets/empty-block.png")
-            ).convert()
-            empty_block = pygame.transform.scale(empty_block,
-                                                 (self._BLOCK_WIDTH,
-                                                  self._BLOCK_HEIGHT)
-                                                 )
-
-            # Import score counters and spot places.
-            for i in range(0, 10):
-                score = pygame.image.load(
-                        os.path.join(base_path, f"assets/score_{i}.png"))
-                score = pygame.transform.scale(score,
-                                               (self._CWIDTH,
-                                                self._CHEIGHT)
-                                               )
-                scores.append(score)
-
-            for i in range(0, 9):
-                spot = pygame.image.load(
-                        os.path.join(base_path, f"assets/{i}.png"))
-                spot = pygame.transform.scale(spot,
-                                              (self._BLOCK_WIDTH,
-                                               self._BLOCK_HEIGHT)
-                                              )
-                spots.append(spot)
-
-            # Smiley faces.
-            smiley = pygame.image.load(
-                    os.path.join(base_path, "assets/smiley.png")
-            ).convert()
-            smiley = pygame.transform.scale(smiley,
-                                            (self._SMILEY_W,
-                                             self._SMILEY_H)
-                                            )
-
-            smiley_cool = pygame.image.load(
-                    os.path.join(base_path, "assets/smiley_cool.png")
-            ).convert()
-            smiley_cool = pygame.transform.scale(smiley_cool,
-                                                 (self._SMILEY_W,
-                                                  self._SMILEY_H)
-                                                 )
-
-            smiley_rip = pygame.image.load(
-                    os.path.join(base_path, "assets/smiley_rip.png")
-            ).convert()
-            smiley_rip = pygame.transform.scale(smiley_rip,
-                                                (self._SMILEY_W,
-                                                 self._SMILEY_H)
-                                                )
-
-            # Bombs.
-            clicked_bomb = pygame.image.load(
-                    os.path.join(base_path, "assets/bomb-at-clicked-block.png")
-            ).convert()
-            clicked_bomb = pygame.transform.scale(clicked_bomb,
-                                                  (self._BLOCK_WIDTH,
-                                                   self._BLOCK_HEIGHT)
-                                                  )
-
-            unclicked_bomb = pygame.image.load(
-                    os.path.join(base_path, "assets/unclicked-bomb.png")
-            ).convert()
-            unclicked_bomb = pygame.transform.scale(unclicked_bomb,
-                                                    (self._BLOCK_WIDTH,
-                                                     self._BLOCK_HEIGHT)
-                                                    )
-
-            # Flags.
-            flag = pygame.image.load(
-                    os.path.join(base_path, "assets/flag.png")
-            ).convert()
-            flag = pygame.transform.scale(flag,
-                                          (self._BLOCK_WIDTH,
-                                           self._BLOCK_HEIGHT)
-                                          )
-
-            flag_wrong = pygame.image.load(
-                    os.path.join(base_path, "assets/wrong-flag.png")
-            ).convert()
-            flag_wrong = pygame.transform.scale(flag_wrong,
-                                                (self._BLOCK_WIDTH,
-                                                 self._BLOCK_HEIGHT)
-                                                )
-
-            question = pygame.image.load(
-                    os.path.join(base_path, "assets/question.png")
-            ).convert()
-            question = pygame.transform.scale(question,
-                                              (self._BLOCK_WIDTH,
-                                               self._BLOCK_HEIGHT)
-                                              )
-
-            icon = pygame.image.load(
-                    os.path.join(base_path, "assets/icon.png")
-            ).convert()
-        except Exception as exp:
-            print("Exception raised when importing assets", exp)
+        self.load_assets()
 
         # Display game icon.
-        pygame.display.set_icon(icon)
+        pygame.display.set_icon(self.icon)
 
-        # Receive game table structure.
-        board_structure = self.create_game_structure()
+        # No-guess boards are searched for in the background.
+        if self.no_guess:
+            self.generator = generator.NoGuessGenerator(
+                    self._ROWS, self._COLUMNS, self._BOMBS)
 
-        # Game states => 0 - playing, 1 - win, 2 - dead/reveal
-        game_state = 0
+        # Boards of the next games are built on a worker thread, so
+        # clicking the smiley does not wait for a generation.
+        self._preparer = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1)
+
+        # Receive game table structure, the first board from the
+        # requested seed.
+        self.start_game(self._SEED)
 
-        # Number of bomb/flag placed.
-        bomb_flag = self._BOMBS
+        # Game states => 0 - playing, 1 - win, 2 - dead/reveal
+        game_state = self.engine.state()
 
         # Smiley face dynamic rectangular.
         smiley_rect = pygame.Rect(self._SMILEY_X, self._SMILEY_Y,
                                   self._SMILEY_W, self._SMILEY_H)
 
-        # Time counter.
-        time_left = self._SECONDS
-
-        # Control variable to test if the player started to move pieces.
-        action_made = False
-
-        # Custom event to measure time.
-        timer_event = pygame.USEREVENT + 1
-        timer_interval = 1000
-        pygame.time.set_timer(timer_event, timer_interval)
-
-        # Infinite game loop.
+        # Time of the next timer tick while the clock is running, and
+        # the earliest time the next frame may be drawn.
+        next_tick = None
+        next_frame = 0
+
+        # Rendering state: whether the whole window or the viewport has
+        # to be redrawn, whether anything changed since the last frame, the
+        # game state the table was drawn for and the last drawn
+        # (flags left, time left, game state) of the counters.
+        redraw_all = True
+        redraw_view = False
+        pending = True
+        drawn_state = game_state
+        hud = None
+
+        # Event driven game loop, sleeping until input, a timer tick
+        # or a delayed frame requires attention.
         running = True
         while running:
-            for event in pygame.event.get():
+            deadline = next_tick
+            if pending and (deadline is None or next_frame < deadline):
+                deadline = next_frame
+            for event in events.wait_events(deadline):
+                pending = True
                 if event.type == pygame.QUIT:
                     running = False
-                if event.type == timer_event and action_made:
-                    if game_state == 0:
-                        time_left -= 1
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    if game_state == 0:
-                        board_structure = self.update_struct(event.pos,
-                                                             board_structure,
-                                                             1)
-                        action_made = True
+                    self.update_struct(event.pos, 1)
                     if smiley_rect.collidepoint(event.pos):
-                        board_structure = self.create_game_structure()
-                        game_state = 0
-                        bomb_flag = self._BOMBS
-                        action_made = False
-                        time_left = self._SECONDS
+                        self.start_game()
+                        redraw_all = True
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 3:
-                    if game_state == 0:
-                        board_structure = self.update_struct(event.pos,
-                                                             board_structure,
-                                                             2)
-                        action_made = True
-
-            # Fill the screen with white.
-            self._BOARD.fill(self._WHITE)
-
-            # Redraw pieces on table.
-            if game_state == 0:
-                for piece in board_structure.items():
-                    if piece[1][2] == 0:  # if it was not discovered.
-                        self._BOARD.blit(
-                                empty_block,
-                                piece[1][0]
-                        )
-                    elif piece[1][2] == 2:
-                        self._BOARD.blit(
-                                flag,
-                                piece[1][0]
-                        )
-                    elif piece[1][2] == 3:
-                        self._BOARD.blit(
-                                question,
-                                piece[1][0]
-                        )
-                    else:  # if discovered, replace with numbered piece or bomb
-                        if piece[1][1] > -1:
-                            self._BOARD.blit(
-                                    spots[piece[1][1]],
-                                    piece[1][0]
-                            )
-                        else:
-                            self._BOARD.blit(
-                                    clicked_bomb,
-                                    piece[1][0]
-                            )
-
-            if game_state == 2 or game_state == 1:  # defeat/reveal
-                for piece in board_structure.items():
-                    if piece[1][1] == -1:
-                        if piece[1][2] == 1:
-                            self._BOARD.blit(
-                                    clicked_bomb,
-                                    piece[1][0]
-                            )
-                        if piece[1][2] == 0:
-                            self._BOARD.blit(
-                                    unclicked_bomb,
-                                    piece[1][0]
-                            )
-                        if piece[1][2] == 2:
-                            self._BOARD.blit(
-                                    flag,
-                                    piece[1][0]
-                            )
-                        if piece[1][2] == 3:
-                            self._BOARD.blit(
-                                    question,
-                                    piece[1][0]
-                            )
-                    else:
-                        self._BOARD.blit(
-                                spots[piece[1][1]],
-                                piece[1][0]
-                        )
-
-            # Update the number of flags placed.
-            flags_placed = 0
-            bombs_discovered = 0
-            for piece in board_structure.values():
-                if piece[2] == 2:
-                    flags_placed += 1
-                    if piece[1] == -1:
-                        bombs_discovered += 1
-                if piece[1] == -1 and piece[2] == 1:  # clicked on a bomb.
-                    game_state = 2
-
-            bomb_flag = self._BOMBS - flags_placed
-            if bombs_discovered == self._BOMBS:
-                game_state = 1
-
-            # Draw bomb/flag counter.
-            self.draw_bomb_counter(self._BOARD, bomb_flag, scores)
-
-            # If the time runs out, game is lost.
-            if time_left <= 0:
-                game_state = 2
-
-            # Draw time counter.
-            self.draw_time_counter(self._BOARD, time_left, scores)
-
-            # Draw smiley face.
-            if game_state == 0:
-                self._BOARD.blit(smiley, smiley_rect)
-            if game_state == 1:
-                self._BOARD.blit(smiley_cool, smiley_rect)
-            if game_state == 2:
-                self._BOARD.blit(smiley_rip, smiley_rect)
-
-            # Update the display.
-            pygame.display.flip()
-
-            # Ensure CPU clock-frame.
-            self._CLOCK.tick(self._FRAMES)
+                    self.update_struct(event.pos, 2)
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                    self.hint()
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_p:
+                    self.show_probabilities = not self.show_probabilities
+                    redraw_view = True
+                view_all, view = self.handle_view_event(event)
+                redraw_all |= view_all
+                redraw_view |= view
+
+            # The clock runs once the game started, one tick a second.
+            now = pygame.time.get_ticks()
+            if (self.engine.started and
+                    self.engine.state() == board_model.PLAYING):
+                if next_tick is None:
+                    next_tick = now + 1000
+                while next_tick <= now:
+                    self.engine.tick()
+                    next_tick += 1000
+                    pending = True
+            else:
+                next_tick = None
+
+            # Draw at most one frame per frame interval.
+            if not pending or not running:
+                continue
+            if self.frame_cap and now < next_frame:
+                continue
+            pending = False
+
+            board_structure = self.engine.board
+
+            # Read the bookkeeping of the engine.
+            bomb_flag = self.engine.flags_left()
+            time_left = self.engine.time_left
+            game_state = self.engine.state()
+
+            # The whole table is revealed once the game ends.
+            if game_state != drawn_state:
+                redraw_all = True
+                drawn_state = game_state
+
+            # Probabilities change all over the board with every move,
+            # so the overlay comes with a redraw of the viewport.
+            overlay = (self.show_probabilities and
+                       game_state == board_model.PLAYING)
+            redraw_view |= overlay
+
+            # Draw the table, then the overlay and the counters over it.
+            dirty = self.draw_table(board_structure, game_state,
+                                    redraw_all, redraw_view)
+            if overlay:
+                dirty.extend(self.draw_probabilities(board_structure))
+            if redraw_all:
+                hud = None
+            redraw_all = False
+            redraw_view = False
+
+            # Redraw counters and smiley face only if they changed.
+            if hud != (bomb_flag, time_left, game_state):
+                hud = (bomb_flag, time_left, game_state)
+                dirty.extend(self.draw_hud(bomb_flag, time_left, game_state))
+
+            # Push only the changed areas to the display.
+            if dirty:
+                pygame.display.update(dirty)
+
+            # Adapt the frame interval: never spend more than half of
+            # the time drawing, so slow frames do not starve the input.
+            if self.frame_cap:
+                spent = pygame.time.get_ticks() - now
+                next_frame = now + max(1000 // self.frame_cap, 2 * spent)
 
         # End-game clean-up.
-        pygame.quit()
+        if self.engine.log is not None:
+            self.engine.log.close()
+        if self.generator is not None:
+            self.generator.close()
+            self.generator = None
+        self._preparer.shutdown(wait=False, cancel_futures=True)
+        self._preparer = None
+        self._next_board = None
@@ -0,0 +1,243 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import utils.board as board_model
+import utils.engine as engine
+import utils.solver as solver
+
+
+def find_start(board):
+    """Finds the opening closest to the centre of a board.
+
+    Looks at the cells ring by ring around the centre, so only the
+    cells up to the first zero are read, even on chunked boards.
+
+    Args:
+        board: Board object to look at.
+
+    Returns:
+        The (x, y) tuple of a zero cell, or None if there is none.
+    """
+    cx, cy = board.columns // 2, board.rows // 2
+    for ring in range(max(board.columns, board.rows)):
+        for x in range(cx - ring, cx + ring + 1):
+            for y in range(cy - ring, cy + ring + 1):
+                if max(abs(x - cx), abs(y - cy)) != ring or \
+                        not board.in_bounds(x, y):
+                    continue
+                if board.value(x, y) == 0:
+                    return x, y
+    return None
+
+
+def possible(rows, cols, bombs):
+    """Tells whether a board can have an opening at all.
+
+    An opening needs a cell and its neighbours free of bombs, at the
+    least a corner of the board and its neighbours.
+
+    Args:
+        rows: Number of rows of the board.
+        cols: Number of columns of the board.
+        bombs: Number of bombs of the board.
+
+    Returns:
+        True if enough cells are free of bombs.
+    """
+    return rows * cols - bombs >= min(rows, 2) * min(cols, 2)
+
+
+def solvable(rows, cols, bombs, seed):
+    """Tells whether a board is solved by pure logic from its opening.
+
+    Plays the board headless from the opening closest to its centre,
+    with only the moves the solver proves.
+
+    Args:
+        rows: Number of rows of the board.
+        cols: Number of columns of the board.
+        bombs: Number of bombs of the board.
+        seed: Seed of the board.
+
+    Returns:
+        The (x, y) tuple of the opening if the solver wins, else None.
+    """
+    chunked = rows * cols >= engine.CHUNKED_CELLS
+    game = engine.new_game(rows, cols, bombs, seed=seed, chunked=chunked)
+    start = find_start(game.board)
+    if start is None:
+        return None
+    solver.play(game, start)
+    return start if game.state() == board_model.WON else None
+
+
+def open_start(game, start=None):
+    """Discovers the opening a no-guess game is solved from.
+
+    The clock keeps waiting for the first move of the player.
+
+    Args:
+        game: Engine object of a new game.
+        start: Optional (x, y) opening, found with find_start when
+            omitted.
+
+    Returns:
+        The (x, y) tuple of the opening, or None if the board has none.
+    """
+    if start is None:
+        start = find_start(game.board)
+    if start is not None:
+        game.reveal(*start)
+        game.started = False
+    return start
+
+
+def _try_seed(task):
+    """Checks a candidate board on a worker process.
+
+    Args:
+        task: A (rows, columns, bombs, seed) tuple.
+
+    Returns:
+        A (seed, start) tuple, start being None for a rejected board.
+    """
+    rows, cols, bombs, seed = task
+    return seed, solvable(rows, cols, bombs, seed)
+
+
+class NoGuessGenerator:
+    """Keeps boards that need no guess ready in the background.
+
+    A thread draws random seeds and has a process pool check the
+    candidate boards with the solver. Boards the solver wins from
+    their opening go to a bounded queue, where they wait to be played.
+    Once the queue is full the thread waits for boards to be taken,
+    so the workers only run to refill it.
+
+    Dense boards are seldom or never won without a guess. When no
+    board passes for _PATIENCE seconds, a plain board goes to the queue
+    instead. When no board ever passed by then, or the boards cannot
+    have an opening at all, the settings are taken as hopeless: the
+    workers stop and only plain boards are handed out.
+
+    Attributes:
+        rows: Number of rows of the boards.
+        cols: Number of columns of the boards.
+        bombs: Number of bombs of the boards.
+        attempts: Number of candidate boards checked so far.
+        accepted: Number of boards that passed.
+        feasible: Whether boards needing no guess are still looked for.
+    """
+
+    # Seconds without a board passing after which a plain board is
+    # handed out instead.
+    _PATIENCE = 3.0
+
+    def __init__(self, rows, cols, bombs, size=4, workers=None):
+        """Inits NoGuessGenerator and starts filling the queue.
+
+        Args:
+            rows: Number of rows of the boards.
+            cols: Number of columns of the boards.
+            bombs: Number of bombs of the boards.
+            size: Number of boards kept ready.
+            workers: Number of processes, defaults to the number of
+                cores.
+        """
+        self.rows = rows
+        self.cols = cols
+        self.bombs = bombs
+        self.attempts = 0
+        self.accepted = 0
+        self.feasible = possible(rows, cols, bombs)
+        self._boards = queue.Queue(size)
+        self._stop = threading.Event()
+        self._pool = None
+        self._thread = None
+        if not self.feasible:
+            return
+        workers = workers or os.cpu_count() or 1
+        # Forked workers would inherit the signal handlers of pygame
+        # and outlive terminate, spawned ones start clean.
+        self._pool = multiprocessing.get_context("spawn").Pool(workers)
+        self._batch = 4 * workers
+        self._thread = threading.Thread(target=self._fill, daemon=True)
+        self._thread.start()
+
+    def _fill(self):
+        """Checks batches of candidates until the generator closes."""
+        since = time.monotonic()
+        while not self._stop.is_set():
+            tasks = [(self.rows, self.cols, self.bombs,
+                      board_model.new_seed()) for _ in range(self._batch)]
+            results = self._pool.imap_unordered(_try_seed, tasks)
+            for _ in tasks:
+                # Waits in short steps to notice the generator closing.
+                while not self._stop.is_set():
+                    try:
+                        seed, start = results.next(timeout=0.1)
+                        break
+                    except multiprocessing.TimeoutError:
+                        continue
+                else:
+                    return
+                self.attempts += 1
+                if start is not None:
+                    self.accepted += 1
+                    since = time.monotonic()
+                elif time.monotonic() - since > self._PATIENCE:
+                    if not self.accepted:
+                        self.feasible = False
+                        return
+                    seed = board_model.new_seed()
+                    since = time.monotonic()
+                else:
+                    continue
+                while not self._stop.is_set():
+                    try:
+                        self._boards.put((seed, start), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+
+    def get(self, timeout=None):
+        """Takes a board from the queue, waiting for one if needed.
+
+        Args:
+            timeout: Optional number of seconds to wait.
+
+        Returns:
+            A (seed, start) tuple, start being the (x, y) opening the
+            board is solved from, or None for a plain board.
+
+        Raises:
+            queue.Empty: No board came in time, or the generator was
+                closed while waiting.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if not self.feasible and self._boards.empty():
+                return board_model.new_seed(), None
+            wait = 0.1 if deadline is None else \
+                min(0.1, max(deadline - time.monotonic(), 0))
+            try:
+                return self._boards.get(timeout=wait)
+            except queue.Empty:
+                if self._stop.is_set() or (
+                        deadline is not None and
+                        time.monotonic() >= deadline):
+                    raise
+
+    def ready(self):
+        """Returns the number of boards waiting in the queue."""
+        return self._boards.qsize()
+
+    def close(self):
+        """Stops the thread and the worker processes."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._pool.terminate()
+            self._pool.join()
@@ -1,7 +1,9 @@
 import pygame
+import utils.assets as assets
+import utils.events as events
+import utils.settings as settings
 import utils.text as text
 import utils.input_box as input_box
-import os
 
 
 class InfoBoard:
@@ -14,6 +16,7 @@ class InfoBoard:
         board_width: An integer representing the width of the board.
         board_height: An integer representing the height of the board.
         board: A pygame.display object representing the initial info board.
+        started: Whether the player started a game with valid settings.
     """
 
     def __init__(self):
@@ -28,10 +31,13 @@ class InfoBoard:
         self.board_height = 400
 
         # Input default values.
-        self.bombs = 10
-        self.rows = 9
-        self.columns = 9
-        self.seconds = 120
+        self.bombs = settings.DEFAULT_BOMBS
+        self.rows = settings.DEFAULT_ROWS
+        self.columns = settings.DEFAULT_COLUMNS
+        self.seconds = settings.DEFAULT_SECONDS
+        # Seed of the first board, None for a random one.
+        self.seed = None
+        self.started = False
 
         # Color codes used.
         self.__WHITE = (255, 255, 255)
@@ -47,7 +53,8 @@ class InfoBoard:
         # How many frames to bound to.
         self.__FRAMES = 30
 
-        # Pygame internal config.
+        # Pygame internal config. Does nothing if the application shell
+        # already initialised pygame, whose window is then resized.
         pygame.init()
 
         self.board = pygame.display.set_mode((
@@ -113,7 +120,12 @@ class InfoBoard:
 
         Builds up the infinite loop, manages events, displays
         text blocks and buttons and
-        updates graphical table constantly.
+        updates graphical table whenever the player acts on it.
+        The pygame session is left open for the game to follow.
+
+        Returns:
+            True if the player started a game, False if the window
+            was closed.
         """
 
         # Add Minesweeper game title to starting screen.
@@ -134,13 +146,14 @@ class InfoBoard:
         rows_input = input_box.InputBox(
                 rows_label.rect.w + rows_label.rect.x + 10,
                 100,
-                50,
+                60,
                 20,
                 self.__LGRAY,
                 self.__DGRAY,
                 self.font,
                 self.font_size,
-                '9'
+                str(settings.DEFAULT_ROWS),
+                5
         )
         rows_label.set_input_box(rows_input)
 
@@ -153,13 +166,14 @@ class InfoBoard:
         col_input = input_box.InputBox(
                 col_label.rect.w + col_label.rect.x + 10,
                 150,
-                50,
+                60,
                 20,
                 self.__LGRAY,
                 self.__DGRAY,
                 self.font,
                 self.font_size,
-                '9'
+                str(settings.DEFAULT_COLUMNS),
+                5
         )
         col_label.set_input_box(col_input)
 
@@ -172,13 +186,14 @@ class InfoBoard:
         bomb_input = input_box.InputBox(
                 bomb_label.rect.w + bomb_label.rect.x + 10,
                 200,
-                50,
+                120,
                 20,
                 self.__LGRAY,
                 self.__DGRAY,
                 self.font,
                 self.font_size,
-                '10'
+                str(settings.DEFAULT_BOMBS),
+                10
         )
         bomb_label.set_input_box(bomb_input)
 
@@ -197,7 +212,7 @@ class InfoBoard:
                 self.__DGRAY,
                 self.font,
                 self.font_size,
-                '120'
+                str(settings.DEFAULT_SECONDS)
         )
         sec_label.set_input_box(sec_input)
 
@@ -217,10 +232,9 @@ class InfoBoard:
         inputs.add(sec_input)
 
         # Import start image from assets folder as object surface.
+        manager = assets.get_manager()
         try:
-            base_path = os.path.dirname(__file__)
-            start_path = os.path.join(base_path, "assets/start_button.png")
-            start_img = pygame.image.load(start_path).convert()
+            start_img = manager.image("start_button")
             start_rect = start_img.get_rect()
         except Exception as exp:
             print("Exception occrrend when importing asset", exp)
@@ -233,18 +247,44 @@ class InfoBoard:
 
         # Import game icon.
         try:
-            base_path = os.path.dirname(__file__)
-            icon_path = os.path.join(base_path, "assets/icon.png")
-            icon_img = pygame.image.load(icon_path).convert()
+            icon_img = manager.image("icon")
         except Exception as exp:
             print("Cannot import game icon", exp)
         # Set game icon.
         pygame.display.set_icon(icon_img)
 
+        # Sleep until the player does something and only then redraw.
         running = True
+        redraw = True
         while running:
+            if redraw:
+                # Fill the screen with white.
+                self.board.fill(self.__WHITE)
+
+                # Draw all text labels.
+                for label in labels:
+                    self.board.blit(label.text_object, label.rect)
+
+                # Draw all input spaces.
+                for inp in inputs:
+                    pygame.draw.rect(self.board, self.__LGRAY, inp.rect)
+                    self.board.blit(inp.text_surf, inp.rect)
+
+                # Display start image.
+                self.board.blit(start_img, start_rect)
+
+                # Update the display.
+                pygame.display.flip()
+
+                # Bound the frame rate while input keeps coming.
+                self.clock.tick(self.__FRAMES)
+                redraw = False
+
             # Loop through the event list.
-            for event in pygame.event.get():
+            for event in events.wait_events():
+                # Pointer moves alone change nothing on the screen.
+                if event.type != pygame.MOUSEMOTION:
+                    redraw = True
                 # If the user presses the OS' exit button.
                 if event.type == pygame.QUIT:
                     running = False
@@ -255,31 +295,10 @@ class InfoBoard:
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if start_rect.collidepoint(event.pos):
                         # If so, assert the input given by the player.
-                        running = not self.validate_input(
+                        self.started = self.validate_input(
                                 rows_label, col_label,
                                 bomb_label, sec_label
                         )
+                        running = not self.started
 
-            # Fill the screen with white.
-            self.board.fill(self.__WHITE)
-
-            # Draw all text labels.
-            for label in labels:
-                self.board.blit(label.text_object, label.rect)
-
-            # Draw all input spaces.
-            for inp in inputs:
-                pygame.draw.rect(self.board, self.__LGRAY, inp.rect)
-                self.board.blit(inp.text_surf, inp.rect)
-
-            # Display start image.
-            self.board.blit(start_img, start_rect)
-
-            # Update the display.
-            pygame.display.flip()
-
-            # Ensure cpu clock frame.
-            self.clock.tick(self.__FRAMES)
-
-        # Cleanup.
-        pygame.quit()
+        return self.started
@@ -20,10 +20,11 @@ class InputBox(pygame.sprite.Sprite):
         active_color: color for when the box is used.
         inactive_color: color for when the box is not used.
         current_color: either active or inactive.
+        max_length: the maximum number of digits accepted.
     """
 
     def __init__(self, x, y, width, height, active_color,
-                 inactive_color, font, font_size, text=''):
+                 inactive_color, font, font_size, text='', max_length=3):
         """Inits the InputBox object with necessary data.
 
         Creates the rectangle, text and font objects used
@@ -42,6 +43,7 @@ class InputBox(pygame.sprite.Sprite):
         self.active_color = active_color
         self.inactive_color = inactive_color
         self.current_color = inactive_color
+        self.max_length = max_length
 
         # Create rect and text to be displayed.
         self.rect = pygame.Rect(self.x, self.y, self.width, self.height)
@@ -76,7 +78,7 @@ class InputBox(pygame.sprite.Sprite):
                 self.current_color = self.inactive_color
         # count only digit entries.
         if event.type == pygame.KEYDOWN and event.unicode.isdigit():
-            if self.active and len(self.text) <= 2:
+            if self.active and len(self.text) < self.max_length:
                 self.text += event.unicode
             # Re-render the text.
             self.text_surf = self.font_surf.render(self.text,
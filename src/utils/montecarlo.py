@@ -0,0 +1,642 @@
+import math
+import time
+import numpy as np
+import utils.probability as probability
+
+
+class SampledMap(probability.ProbabilityMap):
+    """Bomb probabilities estimated from samples, with their bounds.
+
+    Attributes:
+        lower: float64 array, lower bound of the 95% confidence
+            interval of every frontier cell.
+        upper: float64 array, upper bound of the interval.
+        rest_bounds: (lower, upper) bounds of the rest probability.
+        samples: Fewest samples of a group or block of the frontier.
+    """
+
+    def __init__(self, cells, probabilities, known, rest, lower, upper,
+                 rest_bounds, samples):
+        """Inits SampledMap.
+
+        Args:
+            cells: Positions of the frontier cells.
+            probabilities: Estimates of the frontier cells.
+            known: Positions of the discovered and flagged cells.
+            rest: Estimate of the unknown cells off the frontier.
+            lower: Lower bounds of the frontier cells.
+            upper: Upper bounds of the frontier cells.
+            rest_bounds: Bounds of the rest estimate.
+            samples: Fewest samples of a group or block of the frontier.
+        """
+        super().__init__(cells, probabilities, known, rest, False)
+        self.lower = lower
+        self.upper = upper
+        self.rest_bounds = rest_bounds
+        self.samples = samples
+
+
+class Sampler:
+    """Monte Carlo estimator of the bomb probabilities of a board.
+
+    Samples the bomb layouts of every group of the frontier instead of
+    enumerating them, so wide frontiers with many cells still give
+    estimates.
+
+    Many Markov chains run at once. Every step sweeps the frontier by
+    classes of cells sharing no constraint, each class updated in all
+    the chains at once with a handful of NumPy operations, then swaps
+    two cells of every group. Layouts that break constraints are
+    allowed but penalized, which lets the chains move between valid
+    layouts. Every bomb weighs the same tilt, the odds of a bomb off
+    the frontier.
+
+    Groups are counted whole when they are small enough: a sample
+    counts when the group meets all its constraints, by the number of
+    bombs it holds, and the groups are combined with the bombs left
+    off the frontier the way the exact computation does, the tilt
+    taken back out. Wide groups hardly ever meet all their constraints
+    at once, so every group is counted by blocks of nearby cells as
+    well: a sample counts for a block when the constraints around it
+    are met, whatever the rest of the group breaks. Groups without
+    whole samples take the estimates of their blocks, which keep the
+    tilt, and the bombs they hold are taken out of the bombs left.
+
+    The chains of a group run at a ladder of penalties and regularly
+    trade them, so chains stuck around some layouts at a high penalty
+    get to cross to others at a low one. Estimates refine as sampling
+    goes on, and the spread between batches of chains gives their
+    confidence bounds.
+
+    Attributes:
+        frontier: probability.Frontier object being sampled.
+        chains: Number of chains run together.
+        betas: Penalties of a broken constraint along the ladder, in
+            log weight.
+        steps: Number of sweeps run so far.
+        samples: Fewest samples of a group or block so far.
+    """
+
+    # Sweeps run before the first sample, forgetting the start.
+    _BURN_IN = 16
+
+    # Lowest and highest penalties of the ladder.
+    _BETAS = (0.5, 3.0)
+
+    # Batches of chains the confidence bounds are computed from.
+    _BATCHES = 8
+
+    # Default chains, and cell moves a sweep of the default chains
+    # stays around on wide frontiers.
+    _CHAINS = 256
+    _MOVES = 1 << 20
+
+    # Largest group counted whole, the most numbers of bombs counted
+    # for it, and the side of the square blocks.
+    _WHOLE_CELLS = 256
+    _WIDTH = 64
+    _BLOCK_SIDE = 4
+
+    def __init__(self, board, chains=None, levels=4, seed=None,
+                 deadline=None):
+        """Inits Sampler with chains started from local estimates.
+
+        Args:
+            board: Board object to estimate.
+            chains: Optional number of chains run together, rounded up
+                to a multiple of levels. Defaults to fewer chains the
+                wider the frontier, so sweeps stay quick.
+            levels: Number of penalties of the ladder.
+            seed: Optional seed of the random generator.
+            deadline: Optional time.perf_counter value to give up
+                setting up the chains at.
+
+        Raises:
+            probability.OutOfTime: The deadline passed.
+        """
+        self.frontier = frontier = probability.Frontier(board, deadline)
+        cells = len(frontier.cells)
+        if chains is None:
+            chains = min(max(self._MOVES // max(cells, 1),
+                             self._BATCHES * levels), self._CHAINS)
+        replicas = -(-chains // levels)
+        self.chains = chains = replicas * levels
+        self.betas = np.geomspace(*self._BETAS, levels)
+        self.steps = 0
+        self.samples = 0
+        self._burn_in = self._BURN_IN
+        # Time an estimate takes, known from the first sample on.
+        self._reserve = None
+        self._rng = np.random.default_rng(seed)
+        self._batches = min(self._BATCHES, chains)
+
+        # Groups in the order of their first cell, and cells and
+        # constraints ordered by group.
+        _, group = np.unique(frontier.group_labels(), return_inverse=True)
+        self._group = group = group.reshape(-1)
+        groups = int(group.max(initial=-1)) + 1
+        self._order = np.argsort(group, kind="stable")
+        self._sizes = np.bincount(group, minlength=groups)
+        self._first = np.cumsum(self._sizes) - self._sizes
+        # Every constraint has a frontier cell, the group of its last.
+        anchor = frontier.members.max(axis=1)
+        ranked = np.argsort(group[anchor], kind="stable")
+        members = frontier.members[ranked]
+        target = np.append(frontier.needed[ranked], 0)
+        self._starts = np.searchsorted(group[anchor[ranked]],
+                                       np.arange(groups))
+        probability.check_deadline(deadline)
+
+        # Constraints of every cell, padded with a dummy one.
+        count = len(members)
+        self._dummy = count
+        pair_cons, slots = np.nonzero(members >= 0)
+        pair_cells = members[pair_cons, slots]
+        by_cell = np.argsort(pair_cells, kind="stable")
+        pair_cells, pair_cons = pair_cells[by_cell], pair_cons[by_cell]
+        slots = np.arange(pair_cells.size) - np.searchsorted(pair_cells,
+                                                             pair_cells)
+        self._cons = np.full((cells, 8), count, dtype=np.intp)
+        self._cons[pair_cells, slots] = pair_cons
+
+        # Cells sharing a constraint are at most two columns and two
+        # rows apart, so cells three apart both ways move at once.
+        positions = frontier.positions()
+        colours = positions[:, 0] % 3 * 3 + positions[:, 1] % 3
+        self._classes = [np.flatnonzero(colours == colour)
+                         for colour in np.unique(colours)]
+
+        # Chains at every level of the ladder, for every group.
+        self._ladder = np.repeat(
+                np.arange(chains).reshape(replicas, levels, 1), groups,
+                axis=2)
+        self._beta = np.empty((chains, groups))
+        self._beta[self._ladder, np.arange(groups)] = \
+            self.betas[None, :, None]
+        # Chain and group of every move of a step.
+        self._rows = np.repeat(np.arange(chains), groups)
+        self._columns = np.tile(np.arange(groups), chains)
+
+        # Log odds of a bomb off the frontier, the tilt of every bomb.
+        density, rest = probability.local_estimate(frontier)
+        rest = min(max(rest, 0.01), 0.99)
+        self._tilt = math.log(rest / (1 - rest)) if frontier.others else 0.0
+
+        layouts = self._rng.random((chains, cells)) < density
+        self._layouts = layouts
+        # Residual of every constraint: bombs placed less bombs needed.
+        # A constraint holds eight cells at most, so small integers do,
+        # and the padding of the members reads the last, empty column.
+        padded = np.zeros((chains, cells + 1), dtype=np.int8)
+        padded[:, :cells] = layouts
+        residual = padded[:, members].sum(axis=2, dtype=np.int8)
+        self._residual = np.append(residual, np.zeros((chains, 1), np.int8),
+                                   axis=1) - target.astype(np.int8)
+        probability.check_deadline(deadline)
+
+        # Cells of the groups counted whole, by group, and their group
+        # among them.
+        whole = self._sizes <= self._WHOLE_CELLS
+        self._whole = np.flatnonzero(whole)
+        self._whole_cells = self._order[whole[group[self._order]]]
+        self._whole_group = np.searchsorted(self._whole,
+                                            group[self._whole_cells])
+        self._whole_first = np.searchsorted(self._whole_group,
+                                            np.arange(self._whole.size))
+        # Counts of the bombs of every whole group, kept from the first
+        # sample on, once the range of bombs every group holds is known.
+        self._low = None
+
+        # Block of every cell, ordered by group, and the constraints
+        # around every block.
+        side = self._BLOCK_SIDE
+        _, block = np.unique(
+                np.stack((group, positions[:, 0] // side,
+                          positions[:, 1] // side), axis=1),
+                axis=0, return_inverse=True)
+        self._block = block = block.reshape(-1)
+        blocks = int(block.max(initial=-1)) + 1
+        block_groups = np.zeros(blocks, dtype=np.intp)
+        block_groups[block] = group
+        self._block_first = np.searchsorted(block_groups, np.arange(groups))
+        pair_blocks = block[pair_cells]
+        keys = np.unique(pair_blocks * (count + 1) + pair_cons)
+        self._block_cons = keys % (count + 1)
+        self._block_starts = np.searchsorted(keys // (count + 1),
+                                             np.arange(blocks))
+        self._hits = np.zeros((self._batches, cells))
+        self._seen = np.zeros((self._batches, blocks))
+
+    def _pick(self):
+        """Picks a random cell of every group of every chain."""
+        offsets = self._rng.integers(self._sizes,
+                                     size=(self.chains, self._sizes.size))
+        return self._order[(self._first + offsets).ravel()]
+
+    def _change(self, rows, cells, delta):
+        """Computes the penalty change of adding bombs to cells.
+
+        Args:
+            rows: Chain of every move.
+            cells: Frontier cell of every move.
+            delta: +1 to add a bomb, -1 to remove it.
+
+        Returns:
+            A (constraints, change) tuple, the (moves, 8) constraints
+            of the cells and the change of the broken count.
+        """
+        cons = self._cons[cells]
+        before = self._residual.take(rows[:, None] * (self._dummy + 1) +
+                                     cons)
+        change = np.abs(before + delta[:, None]) - np.abs(before)
+        change[cons == self._dummy] = 0
+        return cons, change.sum(axis=1)
+
+    def _apply(self, rows, cells, cons, delta):
+        """Adds bombs to cells of chains, delta being +1 or -1."""
+        self._layouts[rows, cells] = delta > 0
+        # The cells a chain moves at once share no constraint, so only
+        # the dummy one repeats.
+        self._residual[rows[:, None], cons] += delta[:, None]
+        self._residual[:, self._dummy] = 0
+
+    def step(self, deadline=None):
+        """Runs one sweep of every chain.
+
+        Adds or removes a bomb on every frontier cell, a class of cells
+        at a time, then swaps two cells of every group. Cells moving at
+        once share no constraint, and every group is weighed on its
+        own, so their moves are independent. Every class leaves the
+        chains in a valid state, so a sweep can stop between two.
+
+        Args:
+            deadline: Optional time.perf_counter value to stop the
+                sweep at, before its next class.
+
+        Returns:
+            True if the sweep ran to its end.
+        """
+        for cells in self._classes:
+            if deadline is not None and time.perf_counter() > deadline:
+                return False
+            self._flip(cells)
+        self._swap()
+        self.steps += 1
+
+        broken = self._broken()
+        self._exchange(broken)
+        if self.steps > self._burn_in:
+            self._sample(broken)
+        return True
+
+    def _flip(self, cells):
+        """Adds or removes a bomb of cells in every chain.
+
+        Args:
+            cells: Frontier indices sharing no constraint.
+        """
+        rows = np.repeat(np.arange(self.chains), cells.size)
+        cells = np.tile(cells, self.chains)
+        delta = np.where(self._layouts[rows, cells], np.int8(-1),
+                         np.int8(1))
+        cons, change = self._change(rows, cells, delta)
+        log_ratio = delta * self._tilt - \
+            self._beta[rows, self._group[cells]] * change
+        accept = np.log(self._rng.random(rows.size)) < log_ratio
+        self._apply(rows[accept], cells[accept], cons[accept], delta[accept])
+
+    def _swap(self):
+        """Swaps two cells of every group."""
+        first = self._pick()
+        second = self._pick()
+        differ = self._layouts[self._rows, second] != \
+            self._layouts[self._rows, first]
+        rows, columns = self._rows[differ], self._columns[differ]
+        first, second = first[differ], second[differ]
+        delta = np.where(self._layouts[rows, first], np.int8(-1),
+                         np.int8(1))
+        # Move the bomb, then weigh both halves of the swap.
+        cons, change = self._change(rows, first, delta)
+        self._apply(rows, first, cons, delta)
+        other_cons, other_change = self._change(rows, second, -delta)
+        change += other_change
+        accept = (np.log(self._rng.random(rows.size)) <
+                  -self._beta[rows, columns] * change)
+        self._apply(rows[accept], second[accept], other_cons[accept],
+                    -delta[accept])
+        back = ~accept
+        self._apply(rows[back], first[back], cons[back], -delta[back])
+
+    def _broken(self):
+        """Returns the broken count of every group of every chain."""
+        return np.add.reduceat(np.abs(self._residual[:, :self._dummy]),
+                               self._starts, axis=1, dtype=np.int64)
+
+    def _exchange(self, broken):
+        """Trades the penalties of chains at neighbouring levels.
+
+        Pairs the levels from the first or the second one, in turns,
+        and lets every pair of chains trade with the usual replica
+        exchange test, group by group.
+
+        Args:
+            broken: Broken count of every group of every chain.
+        """
+        ladder = self._ladder
+        start = self.steps % 2
+        low = ladder[:, start:-1:2]
+        high = ladder[:, start + 1::2]
+        if not low.size:
+            return
+        columns = np.arange(ladder.shape[2])
+        betas = self.betas[start:-1:2] - self.betas[start + 1::2]
+        log_ratio = betas[None, :, None] * (broken[low, columns] -
+                                            broken[high, columns])
+        swap = np.log(self._rng.random(low.shape)) < log_ratio
+        low_chains = low[swap]
+        ladder[:, start:-1:2][swap] = high[swap]
+        ladder[:, start + 1::2][swap] = low_chains
+        self._beta[ladder, columns] = self.betas[None, :, None]
+
+    def _sample(self, broken):
+        """Counts the samples of the whole groups and of the blocks.
+
+        Args:
+            broken: Broken count of every group of every chain.
+        """
+        self._sample_whole(broken[:, self._whole])
+        self._sample_blocks()
+        # Samples the estimate of every group rests on.
+        samples = np.minimum.reduceat(self._seen.sum(axis=0),
+                                      self._block_first)
+        if self._whole.size:
+            counts = np.add.reduceat(self._counts.sum(axis=0),
+                                     self._group_base)
+            samples[self._whole] = np.where(counts > 0, counts,
+                                            samples[self._whole])
+        self.samples = int(samples.min())
+
+    def _sample_whole(self, broken):
+        """Counts the whole groups meeting their constraints by their bombs.
+
+        The counts of every cell by the number of bombs of its group are
+        kept for all the chains together, the batches keeping only the
+        total of every cell.
+
+        Args:
+            broken: Broken count of every whole group of every chain.
+        """
+        if self._whole.size:
+            bombs = np.add.reduceat(self._layouts[:, self._whole_cells],
+                                    self._whole_first, axis=1)
+        else:
+            bombs = np.zeros((self.chains, 0), dtype=np.int64)
+        if self._low is None:
+            # Room around the bombs the chains hold, counts out of it
+            # are dropped.
+            low, high = bombs.min(axis=0), bombs.max(axis=0)
+            margin = np.maximum(high - low, 4)
+            middle = (low + high) // 2
+            self._low = np.maximum(np.maximum(low - margin, 0),
+                                   middle - self._WIDTH // 2)
+            self._widths = np.minimum(
+                    np.minimum(high + margin, self._sizes[self._whole]),
+                    self._low + self._WIDTH - 1) - self._low + 1
+            self._group_base = np.cumsum(self._widths) - self._widths
+            widths = self._widths[self._whole_group]
+            self._cell_base = np.cumsum(widths) - widths
+            self._counts = np.zeros((self._batches, self._widths.sum()))
+            self._sums = np.zeros(widths.sum())
+            self._whole_hits = np.zeros((self._batches,
+                                         self._whole_cells.size))
+
+        # Only the samples kept are added up.
+        batch = np.arange(self.chains) % self._batches
+        k = bombs - self._low
+        keep = (broken == 0) & (k >= 0) & (k < self._widths)
+        rows, columns = np.nonzero(keep)
+        np.add.at(self._counts, (batch[rows], self._group_base[columns] +
+                                 k[rows, columns]), 1)
+        keep = keep[:, self._whole_group] & \
+            self._layouts[:, self._whole_cells]
+        rows, columns = np.nonzero(keep)
+        np.add.at(self._sums, self._cell_base[columns] +
+                  k[rows, self._whole_group[columns]], 1)
+        np.add.at(self._whole_hits, (batch[rows], columns), 1)
+
+    def _sample_blocks(self):
+        """Counts the blocks meeting the constraints around them."""
+        if not self._block.size:
+            return
+        valid = np.add.reduceat(np.abs(self._residual[:, self._block_cons]),
+                                self._block_starts, axis=1,
+                                dtype=np.int64) == 0
+        hits = valid[:, self._block] & self._layouts
+        for batch in range(self._batches):
+            self._seen[batch] += valid[batch::self._batches].sum(axis=0)
+            self._hits[batch] += hits[batch::self._batches].sum(axis=0)
+
+    def run(self, budget):
+        """Samples until a time budget runs out.
+
+        The budget is looked at between the classes of a sweep as
+        well, so a sweep of a wide frontier does not overrun it, and
+        covers the estimate made at the end.
+
+        Args:
+            budget: Time budget in seconds.
+
+        Returns:
+            The estimate made of every sample so far.
+        """
+        deadline = time.perf_counter() + budget
+        # Sweeps of wide frontiers are slow, so the burn in ends a
+        # quarter of the way through the budget at the latest.
+        burnt = deadline - budget * 0.75
+        stop = deadline - (self._reserve or 0.0)
+        if self.frontier.cells:
+            while time.perf_counter() < stop and self.step(stop):
+                if self.steps <= self._burn_in and \
+                        time.perf_counter() > burnt:
+                    self._burn_in = self.steps
+                elif self._reserve is None and self.steps > self._burn_in:
+                    started = time.perf_counter()
+                    self.estimate()
+                    self._reserve = time.perf_counter() - started
+                    stop = deadline - self._reserve
+        return self.estimate()
+
+    def _combine(self, density, counts, hits, seen, shares, whole=None):
+        """Combines the counts of the groups and blocks into probabilities.
+
+        Groups without whole samples take the estimates of their
+        blocks, and blocks without samples keep their local estimates.
+
+        Args:
+            density: Local estimates of the frontier cells.
+            counts: Counts of every number of bombs of every whole
+                group.
+            hits: Counts of the bombs of every cell in its block.
+            seen: Counts of the samples of every block.
+            shares: Share of the whole group counts of every cell of
+                the whole groups, the counts of all the chains by the
+                number of bombs being scaled by it.
+            whole: Optional mask of the whole groups combined whole
+                over all the chains, those without samples here being
+                left without an estimate.
+
+        Returns:
+            A (frontier probabilities, rest probability, sampled)
+            tuple, sampled telling the frontier cells whose estimate
+            rests on samples, or None if no layout meets the bombs
+            left.
+        """
+        means = density.copy()
+        samples = seen[self._block]
+        sampled = samples > 0
+        means[sampled] = hits[sampled] / samples[sampled]
+
+        groups = []
+        taken = np.zeros(len(self.frontier.cells), dtype=bool)
+        for group, first in enumerate(self._whole_first.tolist()):
+            size = int(self._sizes[self._whole[group]])
+            cells = self._whole_cells[first:first + size]
+            base = self._group_base[group]
+            found = counts[base:base + self._widths[group]]
+            ks = np.flatnonzero(found)
+            if not ks.size:
+                if whole is not None and whole[group]:
+                    # Combined whole over all the chains, so this batch
+                    # has no estimate of it.
+                    sampled[cells] = False
+                continue
+            taken[cells] = True
+            sampled[cells] = True
+            bombs = ks + self._low[group]
+            # Take the tilt back out, and weigh every group as a whole
+            # the same, which keeps the products of many groups finite.
+            logs = -bombs * self._tilt
+            scales = np.exp(logs - logs.max())
+            scales /= np.dot(found[ks], scales)
+            cell_sums = self._sums[
+                    self._cell_base[first:first + size][:, None] + ks] * \
+                shares[first:first + size, None]
+            groups.append((cells, {
+                    int(b): (found[k] * scale, cell_sums[:, i] * scale)
+                    for i, (b, k, scale) in enumerate(zip(bombs, ks,
+                                                          scales))}))
+        # The other cells take the bombs they hold, rounded to whole
+        # ones.
+        combined = probability.combine_groups(
+                self.frontier, groups, int(round(means[~taken].sum())))
+        if combined is None:
+            return None
+        probabilities, rest = combined
+        means[taken] = probabilities[taken]
+        return means, rest, sampled
+
+    def estimate(self):
+        """Estimates the probabilities from the samples so far.
+
+        The samples of all the chains give the estimate, and the
+        spread of the estimates of every batch of chains its 95%
+        confidence bounds. Cells without samples keep their local
+        estimates, with bounds of [0, 1]. Without a frontier, the rest
+        probability is exact.
+
+        Returns:
+            A SampledMap object.
+        """
+        frontier = self.frontier
+        density, rest = probability.local_estimate(frontier)
+        unbounded = np.full(density.size, np.inf)
+        if not frontier.cells:
+            # Every unknown cell is alike, the bombs left spread evenly.
+            return self._map(density, rest, unbounded, 0.0)
+        if self._low is None:
+            return self._map(density, rest, unbounded, np.inf)
+        pooled = self._whole_hits.sum(axis=0)
+        counts = self._counts.sum(axis=0)
+        combined = self._combine(density, counts, self._hits.sum(axis=0),
+                                 self._seen.sum(axis=0),
+                                 np.ones(pooled.size))
+        if combined is None:
+            return self._map(density, rest, unbounded, np.inf)
+        means, rest, sampled = combined
+        if self._whole.size:
+            whole = np.add.reduceat(counts, self._group_base) > 0
+        else:
+            whole = np.zeros(0, dtype=bool)
+
+        estimates = []
+        rests = []
+        for counts, hits, seen, whole_hits in zip(
+                self._counts, self._hits, self._seen, self._whole_hits):
+            shares = np.divide(whole_hits, pooled, out=np.zeros(pooled.size),
+                               where=pooled > 0)
+            combined = self._combine(density, counts, hits, seen, shares,
+                                     whole)
+            if combined is not None:
+                batch, batch_rest, batch_sampled = combined
+                estimates.append(np.where(batch_sampled, batch, np.nan))
+                rests.append(batch_rest)
+        if len(rests) < 2:
+            return self._map(means, rest, unbounded, np.inf)
+        estimates = np.array(estimates)
+        batches = np.isfinite(estimates).sum(axis=0)
+        deviations = np.nan_to_num(estimates - means) ** 2
+        spread = np.where(
+                sampled & (batches > 1),
+                1.96 * np.sqrt(deviations.sum(axis=0) /
+                               np.maximum(batches - 1, 1) /
+                               np.maximum(batches, 1)),
+                np.inf)
+        rest_spread = 1.96 * np.std(rests, ddof=1) / math.sqrt(len(rests))
+        return self._map(means, rest, spread, rest_spread)
+
+    def _map(self, means, rest, spread, rest_spread):
+        """Builds the SampledMap of estimates and their spread.
+
+        Args:
+            means: Estimates of the frontier cells.
+            rest: Estimate of the cells off the frontier.
+            spread: Half width of the interval of every frontier cell.
+            rest_spread: Half width of the interval of the rest.
+
+        Returns:
+            A SampledMap object.
+        """
+        frontier = self.frontier
+        lower = np.clip(means - spread, 0.0, 1.0)
+        upper = np.clip(means + spread, 0.0, 1.0)
+        rest_bounds = (max(rest - rest_spread, 0.0),
+                       min(rest + rest_spread, 1.0))
+        return SampledMap(frontier.positions(), means, frontier.known, rest,
+                          lower, upper, rest_bounds, self.samples)
+
+
+def mine_probabilities(board, budget, chains=None, seed=None):
+    """Estimates the bomb probability of every unknown cell.
+
+    The budget covers reading the board and setting up the chains.
+    When it runs out before they are set up, the bombs left are spread
+    evenly over every unknown cell, with bounds of [0, 1].
+
+    Args:
+        board: Board object to read.
+        budget: Time budget in seconds.
+        chains: Optional number of chains sampled together.
+        seed: Optional seed of the random generator.
+
+    Returns:
+        A SampledMap object.
+    """
+    deadline = time.perf_counter() + budget
+    try:
+        sampler = Sampler(board, chains=chains, seed=seed, deadline=deadline)
+    except probability.OutOfTime:
+        blind = probability.blind_map(board)
+        return SampledMap(blind.cells, blind.probabilities, blind.known,
+                          blind.rest, blind.probabilities,
+                          blind.probabilities, (0.0, 1.0), 0)
+    return sampler.run(deadline - time.perf_counter())
@@ -0,0 +1,608 @@
+import math
+import time
+from collections import deque
+import numpy as np
+import utils.board as board_model
+
+
+# Number of cells up to which the frontier is always read as the
+# rectangle around the marked cells, and the number of cells of that
+# rectangle per marked cell past which it is read cell by cell.
+_WINDOW_CELLS = 1 << 16
+_WINDOW_SHARE = 16
+
+# Constraints listed between two looks at the deadline.
+_CHECK_ROWS = 4096
+
+
+class ProbabilityMap:
+    """Bomb probabilities of the unknown cells of a board.
+
+    Probabilities are kept for the frontier cells, the unknown cells
+    next to a discovered number. Every other unknown cell shares the
+    same probability.
+
+    Attributes:
+        cells: int64 array of shape (n, 2), the (x, y) positions of the
+            frontier cells.
+        probabilities: float64 array, the probability of every frontier
+            cell to hold a bomb.
+        known: int64 array of shape (m, 2), the (x, y) positions of the
+            discovered and flagged cells, which have no probability.
+        rest: Probability of the unknown cells off the frontier.
+        exact: Whether the probabilities are exact. They are local
+            estimates when the time budget ran out.
+    """
+
+    def __init__(self, cells, probabilities, known, rest, exact):
+        """Inits ProbabilityMap.
+
+        Args:
+            cells: Positions of the frontier cells.
+            probabilities: Probabilities of the frontier cells.
+            known: Positions of the discovered and flagged cells.
+            rest: Probability of the unknown cells off the frontier.
+            exact: Whether the probabilities are exact.
+        """
+        self.cells = cells
+        self.probabilities = probabilities
+        self.known = known
+        self.rest = rest
+        self.exact = exact
+
+    def at(self, x, y):
+        """Returns the probability of a cell, NaN if it is not unknown."""
+        return float(self.window(x, y, x + 1, y + 1)[0, 0])
+
+    def window(self, x0, y0, x1, y1):
+        """Copies out the probabilities of a rectangle of cells.
+
+        Args:
+            x0: First column of the rectangle.
+            y0: First row of the rectangle.
+            x1: Column past the last one of the rectangle.
+            y1: Row past the last one of the rectangle.
+
+        Returns:
+            A float64 array of shape (x1 - x0, y1 - y0), NaN for the
+            cells that are not unknown.
+        """
+        out = np.full((x1 - x0, y1 - y0), self.rest)
+        for cells, values in ((self.known, np.nan),
+                              (self.cells, self.probabilities)):
+            xs, ys = cells[:, 0], cells[:, 1]
+            inside = (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+            if np.ndim(values):
+                values = values[inside]
+            out[xs[inside] - x0, ys[inside] - y0] = values
+        return out
+
+
+class Frontier:
+    """Constraints of the discovered numbers over the unknown cells.
+
+    Only the marked cells and their neighbours are read. They are read
+    as the rectangle around them when they fill enough of it, and cell
+    by cell when they are scattered over a big board, so the cost
+    follows the number of marked cells rather than their spread.
+
+    Attributes:
+        cells: (x, y) positions of the frontier cells, the unknown
+            cells, undiscovered or carrying a question mark, next to a
+            discovered number.
+        constraints: List of (frontier indices, bombs) tuples, one per
+            discovered number next to frontier cells.
+        members: int64 array of shape (k, 8), the frontier indices of
+            every constraint, one column per neighbour, -1 where the
+            neighbour is off the frontier.
+        needed: int64 array, the bombs of every constraint.
+        known: int64 array of shape (m, 2), the (x, y) positions of the
+            discovered and flagged cells.
+        others: Number of unknown cells of the board off the frontier.
+        bombs: Number of bombs left among the unknown cells, flags
+            being trusted.
+    """
+
+    def __init__(self, board, deadline=None):
+        """Inits Frontier from the state of a board.
+
+        Args:
+            board: Board object to read.
+            deadline: Optional time.perf_counter value to give up at.
+
+        Raises:
+            OutOfTime: The deadline passed.
+        """
+        # Rectangle holding every marked cell and its neighbours.
+        marked = board.marked_cells()
+        if marked.size:
+            xs, ys = np.divmod(marked, board.rows)
+            x0 = max(int(xs.min()) - 1, 0)
+            y0 = max(int(ys.min()) - 1, 0)
+            x1 = min(int(xs.max()) + 2, board.columns)
+            y1 = min(int(ys.max()) + 2, board.rows)
+        else:
+            x0 = y0 = x1 = y1 = 0
+        area = (x1 - x0) * (y1 - y0)
+        if area <= max(_WINDOW_CELLS, _WINDOW_SHARE * marked.size):
+            self._read_window(board, x0, y0, x1, y1, deadline)
+        else:
+            self._read_cells(board, marked, deadline)
+        self.constraints = []
+        for start in range(0, len(self.needed), _CHECK_ROWS):
+            check_deadline(deadline)
+            rows = self.members[start:start + _CHECK_ROWS].tolist()
+            needed = self.needed[start:start + _CHECK_ROWS].tolist()
+            self.constraints.extend(
+                    ([member for member in row if member >= 0], bombs)
+                    for row, bombs in zip(rows, needed))
+
+        cells = board.columns * board.rows
+        self.others = (cells - board.revealed - board.flags_placed -
+                       len(self.cells))
+        self.bombs = board.bombs - board.flags_placed
+
+    def _read_window(self, board, x0, y0, x1, y1, deadline):
+        """Reads the frontier from a rectangle of the board.
+
+        Args:
+            board: Board object to read.
+            x0: First column of the rectangle.
+            y0: First row of the rectangle.
+            x1: Column past the last one of the rectangle.
+            y1: Row past the last one of the rectangle.
+            deadline: time.perf_counter value to give up at, or None.
+        """
+        values, states = board.window(x0, y0, x1, y1)
+        check_deadline(deadline)
+        unknown = ((states == board_model.HIDDEN) |
+                   (states == board_model.QUESTION))
+        flags = board_model.count_adjacent(states == board_model.FLAG)
+        numbers = (states == board_model.REVEALED) & (values >= 0)
+        numbers &= board_model.count_adjacent(unknown) > 0
+        frontier = unknown & (board_model.count_adjacent(numbers) > 0)
+        check_deadline(deadline)
+
+        # Frontier index of every cell, with a border of -1.
+        width, height = frontier.shape
+        index = np.full((width + 2, height + 2), -1, dtype=np.int64)
+        index[1:-1, 1:-1][frontier] = np.arange(int(frontier.sum()))
+        xs, ys = np.nonzero(numbers)
+        self.members = np.stack(
+                [index[xs + 1 + dx, ys + 1 + dy]
+                 for dx, dy in board_model.NEIGHBOURS], axis=1).reshape(-1, 8)
+        self.needed = (values[xs, ys].astype(np.int64) -
+                       flags[xs, ys].astype(np.int64))
+        xs, ys = np.nonzero(frontier)
+        self.cells = list(zip((xs + x0).tolist(), (ys + y0).tolist()))
+        known = (states == board_model.REVEALED) | \
+            (states == board_model.FLAG)
+        self.known = np.argwhere(known) + (x0, y0)
+
+    def _read_cells(self, board, marked, deadline):
+        """Reads the frontier from the marked cells and their neighbours.
+
+        Args:
+            board: Board object to read.
+            marked: Row-major positions of the marked cells.
+            deadline: time.perf_counter value to give up at, or None.
+        """
+        rows = board.rows
+        xs, ys = np.divmod(marked, rows)
+        near = [marked]
+        for dx, dy in board_model.NEIGHBOURS:
+            inside = ((xs + dx >= 0) & (xs + dx < board.columns) &
+                      (ys + dy >= 0) & (ys + dy < rows))
+            near.append(marked[inside] + dx * rows + dy)
+        positions = np.unique(np.concatenate(near))
+        values, states = board.lookup(positions)
+        xs, ys = np.divmod(positions, rows)
+        check_deadline(deadline)
+
+        # Index of the neighbours of every cell read, -1 for those that
+        # were not read: they are unknown and next to no marked cell.
+        neighbours = np.full((len(board_model.NEIGHBOURS), positions.size),
+                             -1, dtype=np.int64)
+        for k, (dx, dy) in enumerate(board_model.NEIGHBOURS):
+            inside = ((xs + dx >= 0) & (xs + dx < board.columns) &
+                      (ys + dy >= 0) & (ys + dy < rows))
+            target = positions + dx * rows + dy
+            found = np.minimum(np.searchsorted(positions, target),
+                               positions.size - 1)
+            inside &= positions[found] == target
+            neighbours[k, inside] = found[inside]
+
+        def around(mask):
+            counts = np.zeros(positions.size, dtype=np.int64)
+            for row in neighbours:
+                read = row >= 0
+                counts[read] += mask[row[read]]
+            return counts
+
+        unknown = ((states == board_model.HIDDEN) |
+                   (states == board_model.QUESTION))
+        flags = around(states == board_model.FLAG)
+        numbers = (states == board_model.REVEALED) & (values >= 0)
+        numbers &= around(unknown) > 0
+        frontier = unknown & (around(numbers) > 0)
+        check_deadline(deadline)
+
+        index = np.full(positions.size, -1, dtype=np.int64)
+        index[frontier] = np.arange(int(frontier.sum()))
+        self.cells = list(zip(xs[frontier].tolist(), ys[frontier].tolist()))
+        near = neighbours[:, numbers]
+        self.members = np.where(near >= 0, index[near], -1).T.reshape(-1, 8)
+        self.needed = values[numbers].astype(np.int64) - flags[numbers]
+        known = (states == board_model.REVEALED) | \
+            (states == board_model.FLAG)
+        self.known = np.stack((xs[known], ys[known]), axis=1)
+
+    def positions(self):
+        """Returns the frontier cells as an int64 array of shape (n, 2)."""
+        return np.array(self.cells, dtype=np.int64).reshape(-1, 2)
+
+    def group_labels(self):
+        """Labels the frontier cells by the group they belong to.
+
+        Returns:
+            An int64 array with one entry per frontier cell, the index
+            of the first cell of its group.
+        """
+        # Link every member of a constraint to one of them.
+        anchor = self.members.max(axis=1)
+        linked = self.members >= 0
+        linked[anchor < 0] = False
+        return board_model.connected_labels(
+                len(self.cells),
+                np.broadcast_to(anchor[:, None], self.members.shape)[linked],
+                self.members[linked])
+
+    def components(self, deadline=None):
+        """Splits the frontier into independent groups of cells.
+
+        Two frontier cells are in the same group when a chain of
+        constraints links them. Groups come in the order of their first
+        cell.
+
+        Args:
+            deadline: Optional time.perf_counter value to give up at.
+
+        Returns:
+            A list of (cells, constraints) tuples, cells being frontier
+            indices and constraints the (frontier indices, bombs)
+            tuples over them.
+
+        Raises:
+            OutOfTime: The deadline passed.
+        """
+        if not self.cells:
+            return []
+        labels = self.group_labels()
+        check_deadline(deadline)
+
+        anchor = self.members.max(axis=1)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.flatnonzero(np.diff(labels[order])) + 1
+        roots = labels[order[np.r_[0, bounds]]]
+        constraints = np.flatnonzero(anchor >= 0)
+        group = np.searchsorted(roots, labels[anchor[constraints]])
+        ranked = np.argsort(group, kind="stable")
+        splits = np.searchsorted(group[ranked], np.arange(1, roots.size))
+        return [(cells.tolist(), [self.constraints[c] for c in own.tolist()])
+                for cells, own in zip(np.split(order, bounds),
+                                      np.split(constraints[ranked], splits))]
+
+
+class OutOfTime(Exception):
+    """Raised when the computation exceeds its time budget."""
+
+
+def check_deadline(deadline):
+    """Raises OutOfTime once the deadline passed, if there is one."""
+    if deadline is not None and time.perf_counter() > deadline:
+        raise OutOfTime()
+
+
+def enumerate_component(cells, constraints, deadline=None):
+    """Counts the bomb layouts of a frontier group.
+
+    Assigns the cells one by one, in an order that keeps the number of
+    partially assigned constraints low, backtracks as soon as a
+    constraint can no longer be met and memoizes the layouts of the
+    remaining cells by the bombs every open constraint still needs.
+
+    Args:
+        cells: Frontier indices of the group.
+        constraints: (frontier indices, bombs) tuples over the group.
+        deadline: Optional time.perf_counter value to give up at.
+
+    Returns:
+        A dictionary mapping a number of bombs to a (layouts, counts)
+        tuple, the number of layouts with that many bombs and, for
+        every cell in the order of cells, the number of those layouts
+        with a bomb on it.
+
+    Raises:
+        OutOfTime: The deadline passed.
+    """
+    # Breadth-first order along the constraints.
+    touching = {cell: [] for cell in cells}
+    for c, (members, _) in enumerate(constraints):
+        for member in members:
+            touching[member].append(c)
+    order = []
+    seen = set()
+    for start in cells:
+        check_deadline(deadline)
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            order.append(cell)
+            for c in touching[cell]:
+                for member in constraints[c][0]:
+                    if member not in seen:
+                        seen.add(member)
+                        queue.append(member)
+    position = {cell: i for i, cell in enumerate(order)}
+    n = len(order)
+
+    # Constraints of every cell, and their unassigned cells left after
+    # it, and the constraints left open when reaching a cell.
+    last = [max(position[member] for member in members)
+            for members, _ in constraints]
+    first = [min(position[member] for member in members)
+             for members, _ in constraints]
+    after = [[] for _ in range(n)]
+    opening = [[] for _ in range(n + 1)]
+    closing = [[] for _ in range(n + 1)]
+    for c, (members, _) in enumerate(constraints):
+        for member in members:
+            i = position[member]
+            left = sum(1 for other in members if position[other] > i)
+            after[i].append((c, left))
+        opening[first[c] + 1].append(c)
+        closing[last[c] + 1].append(c)
+    check_deadline(deadline)
+    # Constraints open once their first cell is passed, until their
+    # last one is.
+    open_at = []
+    current = {}
+    for i in range(n):
+        current.update(dict.fromkeys(opening[i]))
+        for c in closing[i]:
+            del current[c]
+        open_at.append(list(current))
+    check_deadline(deadline)
+
+    needed = [bombs for _, bombs in constraints]
+    memo = {}
+
+    def solve(i):
+        check_deadline(deadline)
+        if i == n:
+            return {0: (1.0, np.zeros(0))}
+        key = (i, tuple(needed[c] for c in open_at[i]))
+        if key in memo:
+            return memo[key]
+        result = {}
+        for bomb in (0, 1):
+            valid = True
+            for c, left in after[i]:
+                needed[c] -= bomb
+                if not 0 <= needed[c] <= left:
+                    valid = False
+            if valid:
+                for k, (layouts, counts) in solve(i + 1).items():
+                    head = np.concatenate(([layouts * bomb], counts))
+                    if k + bomb in result:
+                        old_layouts, old_counts = result[k + bomb]
+                        result[k + bomb] = (old_layouts + layouts,
+                                            old_counts + head)
+                    else:
+                        result[k + bomb] = (layouts, head)
+            for c, _ in after[i]:
+                needed[c] += bomb
+        memo[key] = result
+        return result
+
+    solved = solve(0)
+    # Back to the order of cells.
+    back = np.array([position[cell] for cell in cells], dtype=np.intp)
+    return {k: (layouts, counts[back])
+            for k, (layouts, counts) in solved.items()}
+
+
+def log_binomial(n, k):
+    """Returns the natural logarithm of n choose k, -inf out of range."""
+    if k < 0 or k > n:
+        return -math.inf
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def local_estimate(frontier):
+    """Estimates the probabilities of the frontier cells locally.
+
+    Every frontier cell gets the highest bomb density among the
+    constraints covering it, and the other cells the density of the
+    bombs left.
+
+    Args:
+        frontier: Frontier object of the board.
+
+    Returns:
+        A (frontier probabilities, rest probability) tuple.
+    """
+    density = np.zeros(len(frontier.cells))
+    linked = frontier.members >= 0
+    sizes = linked.sum(axis=1)
+    ratios = frontier.needed / np.maximum(sizes, 1)
+    np.maximum.at(density, frontier.members[linked],
+                  np.broadcast_to(ratios[:, None], linked.shape)[linked])
+    cells = len(frontier.cells) + frontier.others
+    rest = frontier.bombs / cells if cells else 0.0
+    return np.clip(density, 0.0, 1.0), min(max(rest, 0.0), 1.0)
+
+
+def mine_probabilities(board, budget=None):
+    """Computes the exact bomb probability of every unknown cell.
+
+    Splits the frontier into independent groups, counts the bomb
+    layouts of each group by the number of bombs it holds, and
+    combines the groups with the layouts of the remaining bombs over
+    the unknown cells off the frontier.
+
+    Args:
+        board: Board object to read.
+        budget: Optional time budget in seconds, reading the frontier
+            included. Local estimates are returned when it runs out,
+            or only the density of the bombs left when it runs out
+            before the frontier is read.
+
+    Returns:
+        A ProbabilityMap object.
+    """
+    deadline = None if budget is None else time.perf_counter() + budget
+    try:
+        frontier = Frontier(board, deadline)
+    except OutOfTime:
+        return blind_map(board)
+    try:
+        groups = [(cells, enumerate_component(cells, constraints, deadline))
+                  for cells, constraints in frontier.components(deadline)]
+    except (OutOfTime, RecursionError):
+        return _estimate(frontier)
+    if not all(layouts for _, layouts in groups):
+        # Inconsistent flags, no layout meets the numbers.
+        return _estimate(frontier)
+
+    combined = combine_groups(frontier, groups)
+    if combined is None:
+        return _estimate(frontier)
+    return _build_map(frontier, *combined, True)
+
+
+def combine_groups(frontier, groups, placed=0):
+    """Combines the layouts of the groups of a frontier.
+
+    Weighs every number of bombs the groups hold together with the
+    layouts of the remaining bombs over the unknown cells off the
+    frontier. Layouts of a group only count relative to each other, so
+    any scale works.
+
+    Args:
+        frontier: Frontier object the groups belong to.
+        groups: List of (cells, layouts) tuples, cells being frontier
+            indices and layouts a dictionary mapping a number of bombs
+            of the group to a (layouts, counts) tuple, as returned by
+            enumerate_component.
+        placed: Number of bombs taken by frontier cells out of the
+            groups, left out of the bombs left.
+
+    Returns:
+        A (frontier probabilities, rest probability) tuple, or None if
+        no layout meets the bombs left. Only the cells of the groups
+        have probabilities.
+    """
+    bombs = frontier.bombs - placed
+    # Layouts of every group by bomb count, and the combined layouts of
+    # all the other groups, through prefix and suffix convolutions.
+    polynomials = []
+    for _, layouts in groups:
+        polynomial = np.zeros(max(layouts) + 1)
+        for k, (count, _) in layouts.items():
+            polynomial[k] = count
+        polynomials.append(polynomial)
+    prefix = [np.ones(1)]
+    for polynomial in polynomials:
+        prefix.append(np.convolve(prefix[-1], polynomial))
+    suffix = [np.ones(1)]
+    for polynomial in reversed(polynomials):
+        suffix.append(np.convolve(suffix[-1], polynomial))
+    suffix.reverse()
+    total = prefix[-1]
+
+    # Relative weight of k bombs on the frontier: the layouts of the
+    # remaining bombs off the frontier, scaled to avoid overflows.
+    logs = np.array([log_binomial(frontier.others, bombs - k)
+                     for k in range(len(total) + 1)])
+    with np.errstate(divide="ignore"):
+        peaks = logs[:len(total)] + np.log(total)
+    if not np.isfinite(peaks).any():
+        # Inconsistent flags, nothing exact can be said.
+        return None
+    # Scaled by the likeliest number of bombs, which keeps the weights
+    # of every reachable number within range.
+    weights = np.exp(np.minimum(logs - peaks[np.isfinite(peaks)].max(), 700))
+
+    norm = float(np.dot(total, weights[:len(total)]))
+    if norm == 0:
+        return None
+
+    probabilities = np.zeros(len(frontier.cells))
+    for g, (cells, layouts) in enumerate(groups):
+        others = np.convolve(prefix[g], suffix[g + 1])
+        for k, (_, counts) in layouts.items():
+            weight = float(np.dot(others, weights[k:k + len(others)]))
+            probabilities[cells] += counts * weight
+    probabilities /= norm
+
+    # Expected bombs off the frontier, spread over its cells.
+    if frontier.others:
+        expected = np.arange(len(total))
+        rest = float(np.dot(total * weights[:len(total)],
+                            bombs - expected)) / norm
+        rest /= frontier.others
+    else:
+        rest = 0.0
+    return probabilities, rest
+
+
+def _estimate(frontier):
+    """Falls back to the local estimates of a frontier.
+
+    Args:
+        frontier: Frontier object of the board.
+
+    Returns:
+        A ProbabilityMap object, not exact.
+    """
+    probabilities, rest = local_estimate(frontier)
+    return _build_map(frontier, probabilities, rest, False)
+
+
+def blind_map(board):
+    """Spreads the bombs left evenly over every unknown cell.
+
+    Args:
+        board: Board object to read.
+
+    Returns:
+        A ProbabilityMap object without frontier cells, not exact.
+    """
+    marked = board.marked_cells()
+    _, states = board.lookup(marked)
+    known = marked[states != board_model.QUESTION]
+    unknown = board.columns * board.rows - board.revealed - board.flags_placed
+    rest = (board.bombs - board.flags_placed) / unknown if unknown else 0.0
+    return ProbabilityMap(np.zeros((0, 2), dtype=np.int64), np.zeros(0),
+                          np.stack(np.divmod(known, board.rows), axis=1),
+                          min(max(rest, 0.0), 1.0), False)
+
+
+def _build_map(frontier, probabilities, rest, exact):
+    """Gathers the probabilities of a frontier into a map.
+
+    Args:
+        frontier: Frontier object the probabilities belong to.
+        probabilities: Probabilities of the frontier cells.
+        rest: Probability of the unknown cells off the frontier.
+        exact: Whether the probabilities are exact.
+
+    Returns:
+        A ProbabilityMap object.
+    """
+    return ProbabilityMap(frontier.positions(), probabilities,
+                          frontier.known, rest, exact)
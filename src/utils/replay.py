@@ -0,0 +1,279 @@
+import os
+import struct
+import time
+import numpy as np
+import utils.board as board_model
+import utils.engine as engine
+
+
+# Replay files start with a header describing the board, followed by
+# fixed size action records appended as the game goes on.
+MAGIC = b"MSRP"
+VERSION = 1
+
+# magic, version, columns, rows, bombs, seconds (-1 for no limit),
+# seed, options.
+HEADER = struct.Struct("<4sBIIQiQB")
+
+# Milliseconds since the start of the game, action, x, y.
+RECORD = struct.Struct("<IBII")
+RECORD_DTYPE = np.dtype([("time", "<u4"), ("action", "u1"),
+                         ("x", "<u4"), ("y", "<u4")])
+
+# Bits of the header options.
+QUESTION_MARKS = 1
+CHUNKED = 2
+FIRST_SAFE = 4
+FIRST_OPENING = 8
+
+
+class ReplayLog:
+    """Append-only binary log of the actions of one game.
+
+    The header holds everything needed to generate the board again,
+    seed included, and every action that changed the game is appended
+    as a 13 byte record, timestamped in milliseconds since the log was
+    opened.
+
+    Attributes:
+        path: Path of the log file.
+    """
+
+    def __init__(self, path, game):
+        """Inits ReplayLog and writes the header of a game.
+
+        Args:
+            path: Path of the log file, overwritten if it exists.
+            game: Engine object whose actions are recorded.
+        """
+        self.path = path
+        board = game.board
+        options = 0
+        if game.question_marks:
+            options |= QUESTION_MARKS
+        if isinstance(board, board_model.ChunkedBoard):
+            options |= CHUNKED
+        if game.first_click == engine.FIRST_SAFE:
+            options |= FIRST_SAFE
+        elif game.first_click == engine.FIRST_OPENING:
+            options |= FIRST_OPENING
+        seconds = -1 if game.seconds is None else game.seconds
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, board.columns,
+                                     board.rows, board.bombs, seconds,
+                                     board.seed, options))
+        self._start = time.monotonic()
+
+    def record(self, action, x, y):
+        """Appends an action to the log.
+
+        Args:
+            action: engine.REVEAL, engine.FLAG or engine.TICK.
+            x: Column of the cell, or the seconds of a tick.
+            y: Row of the cell.
+        """
+        elapsed = int((time.monotonic() - self._start) * 1000)
+        self._file.write(RECORD.pack(elapsed, action, x, y))
+
+    def close(self):
+        """Flushes and closes the log file."""
+        self._file.close()
+
+
+def log_path(directory, seed):
+    """Names the log of a game started now.
+
+    Args:
+        directory: Directory of the replay logs.
+        seed: Seed of the board.
+
+    Returns:
+        The path of the log file.
+    """
+    return os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-"
+                                   f"{seed:016x}.replay")
+
+
+def record(game, path):
+    """Starts recording the actions of a game.
+
+    Args:
+        game: Engine object to record.
+        path: Path of the log file.
+
+    Returns:
+        The ReplayLog object attached to the engine.
+    """
+    game.log = ReplayLog(path, game)
+    return game.log
+
+
+def load(path):
+    """Reads a replay log.
+
+    Args:
+        path: Path of the log file.
+
+    Returns:
+        A (header, records) tuple, header being a dictionary of the
+        game settings and records a structured array of RECORD_DTYPE.
+        A record cut short by a crash is dropped.
+
+    Raises:
+        ValueError: The file is not a replay log.
+    """
+    with open(path, "rb") as log_file:
+        data = log_file.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not a replay log")
+    magic, version, columns, rows, bombs, seconds, seed, options = \
+        HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a replay log")
+    header = {
+        "columns": columns,
+        "rows": rows,
+        "bombs": bombs,
+        "seconds": None if seconds < 0 else seconds,
+        "seed": seed,
+        "question_marks": bool(options & QUESTION_MARKS),
+        "chunked": bool(options & CHUNKED),
+        "first_click": (engine.FIRST_OPENING if options & FIRST_OPENING
+                        else engine.FIRST_SAFE if options & FIRST_SAFE
+                        else engine.FIRST_ANY),
+    }
+    count = (len(data) - HEADER.size) // RECORD.size
+    records = np.frombuffer(data, dtype=RECORD_DTYPE, count=count,
+                            offset=HEADER.size)
+    return header, records
+
+
+def new_game(header):
+    """Generates the board of a replay log again.
+
+    Args:
+        header: Header dictionary returned by load.
+
+    Returns:
+        An Engine object in the state the game started in.
+    """
+    return engine.new_game(header["rows"], header["columns"],
+                           header["bombs"], seed=header["seed"],
+                           seconds=header["seconds"],
+                           question_marks=header["question_marks"],
+                           index_regions=(header["rows"] * header["columns"]
+                                          <= engine.INDEX_CELLS),
+                           chunked=header["chunked"],
+                           first_click=header["first_click"])
+
+
+def replay(path):
+    """Plays a replay log again, headless and as fast as possible.
+
+    Timestamps are ignored, only the order of the actions matters.
+
+    Args:
+        path: Path of the log file.
+
+    Returns:
+        An (engine, actions) tuple, the Engine object at the end of the
+        game and the number of actions applied.
+    """
+    header, records = load(path)
+    game = new_game(header)
+    apply = game.apply
+    for action, x, y in zip(records["action"].tolist(),
+                            records["x"].tolist(), records["y"].tolist()):
+        apply(action, x, y)
+    return game, len(records)
+
+
+class Player:
+    """Seekable playback of a replay log.
+
+    The log is played through once when loading, capturing a keyframe
+    of the game every KEYFRAME_INTERVAL actions. Seeking restores the
+    nearest keyframe before the target and only applies the actions
+    left from there, so any point of the game is reached in bounded
+    time whatever the length of the log.
+
+    Attributes:
+        header: Header dictionary of the log.
+        records: Structured array of the actions of the log.
+        engine: Engine object showing the game at the current time.
+        keyframes: Captured games, the n-th one after n * interval
+            actions.
+        interval: Number of actions between two keyframes.
+        position: Number of actions applied to the engine.
+        time: Current time of the playback, in milliseconds.
+    """
+
+    # Default number of actions between two keyframes.
+    KEYFRAME_INTERVAL = 256
+
+    def __init__(self, path, interval=KEYFRAME_INTERVAL):
+        """Inits Player and captures the keyframes of a log.
+
+        Args:
+            path: Path of the log file.
+            interval: Number of actions between two keyframes.
+        """
+        self.header, self.records = load(path)
+        self.interval = interval
+        self._times = self.records["time"]
+        self._actions = list(zip(self.records["action"].tolist(),
+                                 self.records["x"].tolist(),
+                                 self.records["y"].tolist()))
+        self.engine = new_game(self.header)
+        self.keyframes = [self.engine.keyframe()]
+        for start in range(0, len(self._actions), interval):
+            for action in self._actions[start:start + interval]:
+                self.engine.apply(*action)
+            if start + interval <= len(self._actions):
+                self.keyframes.append(self.engine.keyframe())
+        self.position = len(self._actions)
+        self.time = self.duration()
+        self.seek(0)
+
+    def duration(self):
+        """Returns the time of the last action, in milliseconds."""
+        if len(self._times) == 0:
+            return 0
+        return int(self._times[-1])
+
+    def advance(self, at):
+        """Plays the actions up to a time, forward from the current one.
+
+        Args:
+            at: Time to play up to, in milliseconds.
+
+        Returns:
+            True if any action was applied.
+        """
+        target = int(np.searchsorted(self._times, at, side="right"))
+        start = self.position
+        for action in self._actions[start:target]:
+            self.engine.apply(*action)
+        self.position = max(start, target)
+        self.time = max(self.time, at)
+        return target > start
+
+    def seek(self, at):
+        """Jumps to any time of the game.
+
+        Moves forward by playing the actions when no keyframe lies in
+        between, otherwise restores the nearest keyframe at or before
+        that time first.
+
+        Args:
+            at: Time to jump to, in milliseconds.
+        """
+        at = max(0, min(at, self.duration()))
+        target = int(np.searchsorted(self._times, at, side="right"))
+        frame = target // self.interval
+        if target < self.position or \
+                frame > self.position // self.interval:
+            self.engine.restore(self.keyframes[frame])
+            self.position = frame * self.interval
+        self.advance(at)
+        self.time = at
@@ -0,0 +1,91 @@
+# Board size limits. Boards bigger than the window scroll, huge
+# ones are generated chunk by chunk.
+MIN_ROWS = 9
+MAX_ROWS = 99999
+MIN_COLUMNS = 9
+MAX_COLUMNS = 99999
+
+# Shortest time limit of a game, in seconds.
+MIN_SECONDS = 30
+
+# Largest seed of a board, seeds being stored on 64 bits.
+MAX_SEED = 2 ** 63 - 1
+
+# Settings of the settings screen when nothing is entered.
+DEFAULT_ROWS = 9
+DEFAULT_COLUMNS = 9
+DEFAULT_BOMBS = 10
+DEFAULT_SECONDS = 120
+
+
+def validate_rows(rows):
+    """Validates a number of rows.
+
+    The number of rows in this game has to be between
+    MIN_ROWS and MAX_ROWS.
+
+    Args:
+        rows: Number of rows of the board.
+
+    Returns:
+        A boolean value representing this assertion.
+    """
+    return MIN_ROWS <= rows <= MAX_ROWS
+
+
+def validate_cols(cols):
+    """Validates a number of columns.
+
+    The number of columns in this game has to be between
+    MIN_COLUMNS and MAX_COLUMNS.
+
+    Args:
+        cols: Number of columns of the board.
+
+    Returns:
+        A boolean value representing this assertion.
+    """
+    return MIN_COLUMNS <= cols <= MAX_COLUMNS
+
+
+def validate_bombs(bombs, rows, cols):
+    """Validates a number of bombs.
+
+    There can be no negative number of bombs and at most as many
+    bombs as spots available.
+
+    Args:
+        bombs: Number of bombs of the board.
+        rows: Number of rows of the board.
+        cols: Number of columns of the board.
+
+    Returns:
+        A boolean value that represents the validation.
+    """
+    return 0 <= bombs <= rows * cols
+
+
+def validate_seconds(seconds):
+    """Validates a time limit.
+
+    The game has to last at least MIN_SECONDS seconds.
+
+    Args:
+        seconds: Time limit of the game in seconds.
+
+    Returns:
+        A boolean value that represents the assertion.
+    """
+    return seconds >= MIN_SECONDS
+
+
+def validate_seed(seed):
+    """Validates the seed of a board.
+
+    Args:
+        seed: Seed of the bomb placement.
+
+    Returns:
+        True if the seed is between 0 and MAX_SEED.
+    """
+    return 0 <= seed <= MAX_SEED
@@ -0,0 +1,231 @@
+import multiprocessing
+import time
+import numpy as np
+import utils.board as board_model
+import utils.engine as engine
+import utils.probability as probability
+import utils.solver as solver
+
+
+# Time budget of the probabilities behind a guess, in seconds.
+_GUESS_BUDGET = 0.05
+
+
+class Totals:
+    """Running totals of simulated games with the same parameters.
+
+    Totals of separate batches merge into one, so batches played on
+    other processes are aggregated as they come back.
+
+    Attributes:
+        games: Number of games played.
+        won: Number of games won.
+        timed_out: Number of games lost to the timer.
+        moves: Moves of all the games.
+        guesses: Moves of all the games that were not certain.
+        cascades: Number of reveals discovering more than one cell.
+        cascade_cells: Cells discovered by those reveals.
+        largest_cascade: Most cells discovered by a single reveal.
+        seconds: Time spent playing the games, in seconds.
+    """
+
+    def __init__(self):
+        """Inits Totals with no game."""
+        self.games = 0
+        self.won = 0
+        self.timed_out = 0
+        self.moves = 0
+        self.guesses = 0
+        self.cascades = 0
+        self.cascade_cells = 0
+        self.largest_cascade = 0
+        self.seconds = 0.0
+
+    def merge(self, other):
+        """Adds the games of other Totals to these ones.
+
+        Args:
+            other: Totals object to add.
+        """
+        for name in ("games", "won", "timed_out", "moves", "guesses",
+                     "cascades", "cascade_cells", "seconds"):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.largest_cascade = max(self.largest_cascade,
+                                   other.largest_cascade)
+
+    def summary(self):
+        """Sums the games up.
+
+        Returns:
+            A dictionary with the games played, the win rate, the
+            average moves, guesses and time per game and the cascade
+            sizes.
+        """
+        games = max(self.games, 1)
+        return {
+            "games": self.games,
+            "win_rate": self.won / games,
+            "timeout_rate": self.timed_out / games,
+            "moves_per_game": self.moves / games,
+            "guesses_per_game": self.guesses / games,
+            "mean_cascade": self.cascade_cells / max(self.cascades, 1),
+            "largest_cascade": self.largest_cascade,
+            "ms_per_game": self.seconds * 1000 / games,
+        }
+
+
+def _guess(board, rng):
+    """Picks the unknown cell least likely to hold a bomb.
+
+    Args:
+        board: Board object being played.
+        rng: numpy Generator breaking ties off the frontier.
+
+    Returns:
+        An (x, y) tuple.
+    """
+    estimate = probability.mine_probabilities(board, _GUESS_BUDGET)
+    best = None
+    if len(estimate.probabilities):
+        i = int(np.argmin(estimate.probabilities))
+        best = tuple(int(v) for v in estimate.cells[i])
+        if estimate.probabilities[i] <= estimate.rest:
+            return best
+
+    # Cells off the frontier all have the same odds.
+    _, states = board.window(0, 0, board.columns, board.rows)
+    hidden = states == board_model.HIDDEN
+    hidden[estimate.cells[:, 0], estimate.cells[:, 1]] = False
+    cells = np.argwhere(hidden)
+    if best is None or len(cells):
+        x, y = cells[rng.integers(len(cells))]
+        best = int(x), int(y)
+    return best
+
+
+def play_game(rows, cols, bombs, seed, seconds=None, moves_per_second=2):
+    """Plays a game headless with the solver, guessing when stuck.
+
+    The first move and every move the solver cannot prove are
+    guesses on the cell least likely to hold a bomb.
+
+    Args:
+        rows: Number of rows of the board.
+        cols: Number of columns of the board.
+        bombs: Number of bombs of the board.
+        seed: Seed of the board.
+        seconds: Optional time limit in seconds.
+        moves_per_second: Pace of the player, the timer runs a second
+            every that many moves.
+
+    Returns:
+        A Totals object of the game.
+    """
+    start = time.perf_counter()
+    game = engine.new_game(rows, cols, bombs, seed=seed, seconds=seconds)
+    board = game.board
+    player = solver.Solver(board)
+    # A stream of its own, the one of the seed places the bombs.
+    rng = np.random.default_rng([seed, 1])
+    totals = Totals()
+
+    def move(action, x, y):
+        if action == engine.REVEAL:
+            revealed = board.revealed
+            game.reveal(x, y)
+            discovered = board.revealed - revealed
+            if discovered > 1:
+                totals.cascades += 1
+                totals.cascade_cells += discovered
+                totals.largest_cascade = max(totals.largest_cascade,
+                                             discovered)
+        else:
+            game.toggle_flag(x, y)
+        totals.moves += 1
+        if totals.moves % moves_per_second == 0:
+            game.tick()
+
+    guess = (cols // 2, rows // 2)
+    while game.state() == board_model.PLAYING:
+        if guess is not None:
+            totals.guesses += 1
+            move(engine.REVEAL, *guess)
+            guess = None
+            continue
+        safe, mines = player.moves()
+        marked = board.revealed + board.flags_placed
+        for x, y in safe:
+            if game.state() != board_model.PLAYING:
+                break
+            move(engine.REVEAL, x, y)
+        for x, y in mines:
+            if game.state() != board_model.PLAYING:
+                break
+            move(engine.FLAG, x, y)
+        if board.revealed + board.flags_placed == marked:
+            guess = _guess(board, rng)
+    player.close()
+
+    state = game.state()
+    totals.games = 1
+    totals.won = int(state == board_model.WON)
+    totals.timed_out = int(state == board_model.LOST and
+                           game.time_left is not None and
+                           game.time_left <= 0)
+    totals.seconds = time.perf_counter() - start
+    return totals
+
+
+def play_batch(task):
+    """Plays a batch of games with the same parameters.
+
+    Runs on the worker processes of simulate.
+
+    Args:
+        task: A (parameters, first seed, games, moves per second)
+            tuple, parameters being a (rows, columns, bombs, seconds)
+            tuple. Games use consecutive seeds.
+
+    Returns:
+        A (parameters, Totals) tuple.
+    """
+    parameters, first_seed, games, moves_per_second = task
+    rows, cols, bombs, seconds = parameters
+    totals = Totals()
+    for seed in range(first_seed, first_seed + games):
+        totals.merge(play_game(rows, cols, bombs, seed, seconds,
+                               moves_per_second))
+    return parameters, totals
+
+
+def simulate(grid, games, seed=0, workers=None, batch=500,
+             moves_per_second=2):
+    """Plays games for every parameters on all the cores.
+
+    Games are split into batches spread over a process pool, and the
+    totals of every parameters are updated as batches finish.
+
+    Args:
+        grid: Iterable of (rows, columns, bombs, seconds) tuples,
+            seconds being None for no limit.
+        games: Number of games of every parameters.
+        seed: Seed of the first game of every parameters.
+        workers: Number of processes, defaults to the number of cores.
+        batch: Number of games of a batch.
+        moves_per_second: Pace of the player, see play_game.
+
+    Yields:
+        (parameters, Totals) tuples, the running totals of the
+        parameters of every batch as it finishes.
+    """
+    tasks = [(tuple(parameters), first, min(batch, seed + games - first),
+              moves_per_second)
+             for parameters in grid
+             for first in range(seed, seed + games, batch)]
+    totals = {}
+    with multiprocessing.Pool(workers) as pool:
+        for parameters, done in pool.imap_unordered(play_batch, tasks):
+            running = totals.setdefault(parameters, Totals())
+            running.merge(done)
+            yield parameters, running
+
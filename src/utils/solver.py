@@ -0,0 +1,235 @@
+from collections import deque
+import utils.board as board_model
+
+
+class Solver:
+    """Deterministic constraint propagation over the board frontier.
+
+    Every discovered number next to undiscovered cells is a
+    constraint: its unknown neighbours hold exactly its number of
+    bombs, less the flags around it. Flags are trusted to be bombs.
+    The solver applies the single cell rules, where a constraint is
+    all safe or all bombs, and the pair rule between two constraints
+    sharing unknown cells, which covers subsets, and chains the
+    deductions until nothing more follows.
+
+    Constraints are indexed by the unknown cells they cover and only
+    those around a change of the board are looked at again, so the
+    work of a move follows the size of the change instead of the size
+    of the board.
+
+    Attributes:
+        board: Board object being solved.
+        safe: Row-major positions proven free of bombs, not discovered
+            yet.
+        mines: Row-major positions proven to be bombs, not flagged yet.
+    """
+
+    def __init__(self, board):
+        """Inits Solver and subscribes it to the changes of a board.
+
+        Args:
+            board: Board object to solve. Cells already discovered or
+                flagged are taken into account.
+        """
+        self.board = board
+        self.safe = set()
+        self.mines = set()
+        # Constraint of every frontier number: (unknown cells, bombs).
+        self._constraints = {}
+        # Frontier numbers covering every unknown cell.
+        self._covering = {}
+        # Cells whose constraint has to be computed again.
+        self._dirty = set()
+        board.listeners.append(self.update)
+        self.update(board.marked_cells().tolist())
+
+    def close(self):
+        """Stops following the changes of the board."""
+        self.board.listeners.remove(self.update)
+
+    def _neighbours(self, cell):
+        """Lists the row-major positions adjacent to a cell."""
+        rows = self.board.rows
+        x, y = divmod(cell, rows)
+        return [nx * rows + ny for nx, ny in self.board.neighbours(x, y)]
+
+    def update(self, cells):
+        """Takes changes of the board into account.
+
+        Marks the changed cells and the numbers around them to be
+        looked at again by the next call to moves.
+
+        Args:
+            cells: Row-major positions of the changed cells.
+        """
+        for cell in cells:
+            self.safe.discard(cell)
+            self.mines.discard(cell)
+            self._dirty.add(cell)
+            self._dirty.update(self._neighbours(cell))
+
+    def _constraint(self, cell):
+        """Computes the constraint of a cell.
+
+        Args:
+            cell: Row-major position of the cell.
+
+        Returns:
+            A (unknown cells, bombs) tuple, or None if the cell is not
+            a discovered number next to unknown cells.
+        """
+        board = self.board
+        x, y = divmod(cell, board.rows)
+        if board.state(x, y) != board_model.REVEALED:
+            return None
+        bombs = board.value(x, y)
+        if bombs == board_model.BOMB:
+            return None
+        unknown = []
+        for neighbour in self._neighbours(cell):
+            state = board.state(*divmod(neighbour, board.rows))
+            if state == board_model.FLAG or neighbour in self.mines:
+                bombs -= 1
+            elif state != board_model.REVEALED and \
+                    neighbour not in self.safe:
+                unknown.append(neighbour)
+        if not unknown:
+            return None
+        return frozenset(unknown), bombs
+
+    def _store(self, cell, constraint):
+        """Replaces the constraint of a cell in the index.
+
+        Args:
+            cell: Row-major position of the cell.
+            constraint: New constraint of the cell, or None.
+        """
+        old = self._constraints.pop(cell, None)
+        if old is not None:
+            for unknown in old[0]:
+                covering = self._covering[unknown]
+                covering.discard(cell)
+                if not covering:
+                    del self._covering[unknown]
+        if constraint is not None:
+            self._constraints[cell] = constraint
+            for unknown in constraint[0]:
+                self._covering.setdefault(unknown, set()).add(cell)
+
+    def _deduce(self, cell):
+        """Applies the rules to the constraint of a cell.
+
+        Args:
+            cell: Row-major position of a frontier number.
+
+        Returns:
+            A (safe, mines) tuple of sets of row-major positions.
+        """
+        unknown, bombs = self._constraints[cell]
+        if bombs == 0:
+            return unknown, ()
+        if bombs == len(unknown):
+            return (), unknown
+        safe = set()
+        mines = set()
+        related = set()
+        for position in unknown:
+            related.update(self._covering[position])
+        related.discard(cell)
+        for other in related:
+            other_unknown, other_bombs = self._constraints[other]
+            only_here = unknown - other_unknown
+            only_there = other_unknown - unknown
+            # All the cells only here are bombs when they are needed to
+            # reach the difference, the cells only there are then safe.
+            if bombs - other_bombs == len(only_here):
+                mines |= only_here
+                safe |= only_there
+            elif other_bombs - bombs == len(only_there):
+                mines |= only_there
+                safe |= only_here
+        return safe, mines
+
+    def moves(self):
+        """Finds the moves that are certain.
+
+        Looks at the constraints around the changes since the previous
+        call and propagates what they prove.
+
+        Returns:
+            A (safe, mines) tuple of lists of (x, y) tuples, the cells
+            that can be discovered and the cells holding bombs.
+        """
+        board = self.board
+        work = deque(self._dirty)
+        queued = set(self._dirty)
+        self._dirty.clear()
+        while work:
+            cell = work.popleft()
+            queued.discard(cell)
+            self._store(cell, self._constraint(cell))
+            if cell not in self._constraints:
+                continue
+            safe, mines = self._deduce(cell)
+            for proven, found in ((self.safe, safe), (self.mines, mines)):
+                for position in found:
+                    # Constraints still waiting in the queue may cover
+                    # cells discovered or flagged since.
+                    if position in proven or board.state(
+                            *divmod(position, board.rows)) in (
+                            board_model.REVEALED, board_model.FLAG):
+                        continue
+                    proven.add(position)
+                    # The numbers covering it lose an unknown cell.
+                    for number in self._covering.get(position, ()):
+                        if number not in queued:
+                            queued.add(number)
+                            work.append(number)
+        rows = self.board.rows
+        return ([divmod(cell, rows) for cell in sorted(self.safe)],
+                [divmod(cell, rows) for cell in sorted(self.mines)])
+
+    def hint(self):
+        """Finds a cell that is certainly free of bombs.
+
+        Returns:
+            An (x, y) tuple, or None if no cell is certain.
+        """
+        safe, _ = self.moves()
+        return safe[0] if safe else None
+
+
+def play(game, start=None):
+    """Plays a game as far as certain moves go.
+
+    Discovers the proven cells and flags the proven bombs until the
+    game ends or no move is certain any more.
+
+    Args:
+        game: Engine object to play.
+        start: Optional (x, y) cell discovered first.
+
+    Returns:
+        The number of moves played.
+    """
+    solver = Solver(game.board)
+    played = 0
+    if start is not None and game.reveal(*start):
+        played += 1
+    while game.state() == board_model.PLAYING:
+        safe, mines = solver.moves()
+        changed = False
+        for x, y in safe:
+            if game.reveal(x, y):
+                changed = True
+                played += 1
+        for x, y in mines:
+            if game.board.state(x, y) == board_model.HIDDEN and \
+                    game.toggle_flag(x, y):
+                changed = True
+                played += 1
+        if not changed:
+            break
+    solver.close()
+    return played
@@ -1,4 +1,5 @@
 import pygame
+import utils.settings as settings
 
 
 class TextLabel(pygame.sprite.Sprite):
@@ -72,22 +73,24 @@ class TextLabel(pygame.sprite.Sprite):
     def validate_rows(self):
         """Validates the input rows asssociated with this text label.
 
-        The number of rows in this game has to be between 5 and 50.
+        The number of rows in this game has to be between
+        settings.MIN_ROWS and settings.MAX_ROWS.
 
         Returns:
             A boolean value representing this assertion.
         """
-        return (9 <= self.inp.get_text() and self.inp.get_text() <= 30)
+        return settings.validate_rows(self.inp.get_text())
 
     def validate_cols(self):
         """Validates the input columns associated with this label.
 
-        The number of columns in this game has to be between 5 and 50.
+        The number of columns in this game has to be between
+        settings.MIN_COLUMNS and settings.MAX_COLUMNS.
 
         Returns:
             A boolean value representing this assertion.
         """
-        return (9 <= self.inp.get_text() and self.inp.get_text() <= 70)
+        return settings.validate_cols(self.inp.get_text())
 
     def validate_bombs(self, rows, cols):
         """Validates the number of bombs given as input.
@@ -103,7 +106,7 @@ class TextLabel(pygame.sprite.Sprite):
         Returns:
             A boolean value that represents the validaton.
         """
-        return self.inp.get_text() <= (rows * cols)
+        return settings.validate_bombs(self.inp.get_text(), rows, cols)
 
     def validate_seconds(self):
         """Validates input seconds.
@@ -115,4 +118,4 @@ class TextLabel(pygame.sprite.Sprite):
         Returns:
             A boolean value that represents the assertion.
         """
-        return self.inp.get_text() >= 30
+        return settings.validate_seconds(self.inp.get_text())
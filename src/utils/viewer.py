@@ -0,0 +1,158 @@
+import types
+import pygame
+import utils.events as events
+import utils.game as game
+import utils.replay as replay
+
+
+class ReplayViewer(game.Game):
+    """Plays a recorded game back in the game window.
+
+    Draws the game of a replay log with the regular renderer, at a
+    speed of 1x up to 1000x. Seeking goes through the keyframes of the
+    replay Player, so jumping anywhere in a long game is immediate.
+
+    Controls: space pauses, [ and ] change the speed, , and . jump
+    10 seconds back and forth, Home and End jump to the start and the
+    end and the digit keys to tenths of the game. The board scrolls
+    and zooms as in the game.
+
+    Attributes:
+        player: replay.Player object of the log.
+        speed: Playback speed, a factor of _SPEEDS.
+        paused: Whether the playback is paused.
+    """
+
+    # Playback speeds, as factors of the recorded time.
+    _SPEEDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+    # Milliseconds skipped by the seeking keys.
+    _SEEK_STEP = 10000
+
+    def __init__(self, path, speed=1, frame_cap=30):
+        """Inits ReplayViewer and captures the keyframes of a log.
+
+        Args:
+            path: Path of the replay log.
+            speed: Initial playback speed, rounded to one of _SPEEDS.
+            frame_cap: Maximum number of frames drawn per second.
+        """
+        self.player = replay.Player(path)
+        header = self.player.header
+        settings = types.SimpleNamespace(
+                rows=header["rows"], columns=header["columns"],
+                bombs=header["bombs"], seconds=header["seconds"] or 0,
+                seed=header["seed"])
+        super().__init__(settings, frame_cap=frame_cap)
+        self.engine = self.player.engine
+        self.speed = min(self._SPEEDS, key=lambda level: abs(level - speed))
+        self.paused = False
+
+    def handle_playback_event(self, event):
+        """Pauses, seeks or changes the speed following the input.
+
+        Args:
+            event: pygame event to handle.
+
+        Returns:
+            True if the playback jumped, so the table has to be drawn
+            again.
+        """
+        if event.type != pygame.KEYDOWN:
+            return False
+        player = self.player
+        level = self._SPEEDS.index(self.speed)
+        if event.key == pygame.K_SPACE:
+            self.paused = not self.paused
+        elif event.key == pygame.K_RIGHTBRACKET:
+            self.speed = self._SPEEDS[min(level + 1, len(self._SPEEDS) - 1)]
+        elif event.key == pygame.K_LEFTBRACKET:
+            self.speed = self._SPEEDS[max(level - 1, 0)]
+        elif event.key == pygame.K_COMMA:
+            player.seek(player.time - self._SEEK_STEP)
+            return True
+        elif event.key == pygame.K_PERIOD:
+            player.seek(player.time + self._SEEK_STEP)
+            return True
+        elif event.key == pygame.K_HOME:
+            player.seek(0)
+            return True
+        elif event.key == pygame.K_END:
+            player.seek(player.duration())
+            return True
+        elif pygame.K_0 <= event.key <= pygame.K_9:
+            player.seek(player.duration() * (event.key - pygame.K_0) // 10)
+            return True
+        return False
+
+    def caption(self):
+        """Returns the window title showing the playback position."""
+        player = self.player
+        state = "paused" if self.paused else f"{self.speed}x"
+        return (f"Minesweeper replay {player.time // 1000}s / "
+                f"{player.duration() // 1000}s ({state})")
+
+    def play(self):
+        """Plays the replay back until the window is closed.
+
+        Sleeps on the event queue while paused or once the end of the
+        replay is reached, otherwise draws a frame every frame
+        interval.
+        """
+        self.load_assets()
+        pygame.display.set_icon(self.icon)
+
+        frame = 1000 // self.frame_cap
+        redraw_all = True
+        redraw_view = False
+        hud = None
+        drawn_state = None
+        title = None
+        last = pygame.time.get_ticks()
+
+        running = True
+        while running:
+            player = self.player
+            playing = (not self.paused and
+                       player.time < player.duration())
+            deadline = last + frame if playing else None
+            for event in events.wait_events(deadline):
+                if event.type == pygame.QUIT:
+                    running = False
+                redraw_all |= self.handle_playback_event(event)
+                view_all, view = self.handle_view_event(event)
+                redraw_all |= view_all
+                redraw_view |= view
+            if not running:
+                break
+
+            # Move the playback forward by the time that passed.
+            now = pygame.time.get_ticks()
+            if playing:
+                player.advance(player.time + (now - last) * self.speed)
+            last = now
+
+            engine = self.engine
+            game_state = engine.state()
+            # The whole table is revealed once the game ends.
+            if game_state != drawn_state:
+                redraw_all = True
+                drawn_state = game_state
+            dirty = self.draw_table(engine.board, game_state,
+                                    redraw_all, redraw_view)
+            if redraw_all:
+                hud = None
+            redraw_all = False
+            redraw_view = False
+
+            bomb_flag = engine.flags_left()
+            time_left = engine.time_left or 0
+            if hud != (bomb_flag, time_left, game_state):
+                hud = (bomb_flag, time_left, game_state)
+                dirty.extend(self.draw_hud(bomb_flag, time_left, game_state))
+            if dirty:
+                pygame.display.update(dirty)
+
+            if title != self.caption():
+                title = self.caption()
+                pygame.display.set_caption(title)